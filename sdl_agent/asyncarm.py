@@ -0,0 +1,101 @@
+# asyncarm.py
+
+import asyncio
+from contextlib import asynccontextmanager
+from robotmotion import uFactory_xArm, _PENDING
+from cancel import CancelToken, Cancelled
+
+
+class AsyncArm:
+    """
+    asyncio facade over the uFactory_xArm handle.
+
+    Each call runs the synchronous uFactory_xArm method in a worker thread, so
+    the event loop keeps serving LLM and I/O work while the arm travels. It is
+    the same code path as the static API: compiled and blended programs, joint
+    transfers, overlapped grips, grasp checks, cancellation, telemetry segment
+    stamps and the "arm" zone, which also keeps it from driving the arm at the
+    same time as a synchronous caller. A uFactory_xArm.dry_run() opened around
+    the awaits applies to the calls, as asyncio.to_thread copies the caller's
+    context. To buffer motion use `async with arm.batch()`, which flushes in a
+    worker thread too; the synchronous batch() would flush on the event loop.
+
+    Cancelling the awaiting task cancels the call (uFactory_xArm.cancel()): the
+    arm stops at its next waypoint and unwinds, and the task ends once it has.
+
+        arm = AsyncArm()
+        await arm.move_to(uFactory_xArm.offsethome)
+        await arm.gripper_open()
+    """
+
+    async def _call(self, fn, *args):
+        token = CancelToken(f"async {fn.__name__}")
+        def work():
+            with uFactory_xArm.cancellable(token):
+                return fn(*args)
+        task = asyncio.ensure_future(asyncio.to_thread(work))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            uFactory_xArm.cancel("task cancelled", token)
+            try:
+                await task      # the arm is unwinding; leave it at rest
+            except Cancelled:
+                pass
+            raise
+
+    async def flush(self):
+        await self._call(uFactory_xArm.flush)
+
+    @asynccontextmanager
+    async def batch(self):
+        """uFactory_xArm.batch() for awaits: the motion queued inside is flushed in a worker thread."""
+        if _PENDING.get() is not None:
+            yield
+            return
+        reset = _PENDING.set([])
+        try:
+            yield
+        finally:
+            try:
+                await self.flush()
+            finally:
+                _PENDING.reset(reset)
+
+    async def run(self, prog, route=None):
+        await self._call(uFactory_xArm.run, prog, route)
+
+    # ----- same surface as uFactory_xArm -----
+
+    async def move_to(self, pos, speed_override=None):
+        await self._call(uFactory_xArm.move_to, pos, speed_override)
+
+    async def gripper_open(self, pos=130, speed=2000):
+        await self._call(uFactory_xArm.gripper_open, pos, speed)
+
+    async def gripper_close(self, pos=0, speed=2000):
+        await self._call(uFactory_xArm.gripper_close, pos, speed)
+
+    async def get_pose(self):
+        return await self._call(uFactory_xArm.get_pose)
+
+    async def go_home(self):
+        await self._call(uFactory_xArm.go_home)
+
+    async def pick_sample_from_bed(self, i:int):
+        await self._call(uFactory_xArm.pick_sample_from_bed, i)
+
+    async def place_sample_to_bed(self, i:int):
+        await self._call(uFactory_xArm.place_sample_to_bed, i)
+
+    async def place_sample_to_userarea(self):
+        await self._call(uFactory_xArm.place_sample_to_userarea)
+
+    async def pick_sample_from_userarea(self):
+        await self._call(uFactory_xArm.pick_sample_from_userarea)
+
+    async def place_sample_to_measurementstation(self):
+        await self._call(uFactory_xArm.place_sample_to_measurementstation)
+
+    async def pick_sample_from_measurementstation(self):
+        await self._call(uFactory_xArm.pick_sample_from_measurementstation)
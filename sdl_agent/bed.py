@@ -0,0 +1,70 @@
+# bed.py
+
+import re
+import numpy as np
+
+_NAME = re.compile(r"sample(\d+)(above)?")
+
+
+class Bed:
+    """
+    Sample tray as a (n, 2, 7) array of [approach, slot] poses in the pose
+    table's [x, y, z, roll, pitch, yaw, speed] layout, indexed by slot 1..n.
+
+    grid() lays slots out from origin in row-major order, so 24/48/96-well
+    trays are a few parameters. from_poses() takes hand-taught poses as they
+    are, which is how the original five-slot bed is kept. Slots keep the
+    original pose-table names, "sample{i}above" and "sample{i}", see named().
+    """
+
+    def __init__(self, poses):
+        self.poses = np.asarray(poses, dtype=float)
+        if self.poses.ndim != 3 or self.poses.shape[1:] != (2, 7):
+            raise ValueError(f"bed poses must be (n, 2, 7), got {self.poses.shape}")
+
+    @classmethod
+    def grid(cls, origin, pitch, rows, cols, approach=105.0,
+             slot_rpy=(180, 0, 0), approach_rpy=(-180, 0, 0), speed=200, approach_speed=300):
+        """
+        origin is slot 1's [x, y, z]; pitch is (row_dx, col_dy) in mm. Approach
+        poses sit `approach` mm above their slot.
+        """
+        r, c = np.divmod(np.arange(rows * cols), cols)
+        xyz = np.asarray(origin, dtype=float) + np.stack(
+            [r * pitch[0], c * pitch[1], np.zeros(rows * cols)], axis=1)
+        poses = np.empty((rows * cols, 2, 7))
+        poses[:, 0, :3] = xyz + [0, 0, approach]
+        poses[:, 0, 3:6] = approach_rpy
+        poses[:, 0, 6] = approach_speed
+        poses[:, 1, :3] = xyz
+        poses[:, 1, 3:6] = slot_rpy
+        poses[:, 1, 6] = speed
+        return cls(poses)
+
+    @classmethod
+    def from_poses(cls, slots):
+        """slots: [(approach, slot), ...] pose-table rows for slots 1..n."""
+        return cls([[above, pose] for above, pose in slots])
+
+    def __len__(self):
+        return len(self.poses)
+
+    def slot(self, i):
+        """(approach, slot) pose-table rows for slot i."""
+        if not (1 <= i <= len(self.poses)):
+            raise ValueError(f"i must be 1..{len(self.poses)}")
+        above, pose = self.poses[i - 1].tolist()
+        return above, pose
+
+    def named(self):
+        """{"sample{i}above": approach, "sample{i}": slot} rows for every slot."""
+        return {f"sample{i}{suffix}": row for i, rows in enumerate(self.poses.tolist(), 1)
+                for suffix, row in (("above", rows[0]), ("", rows[1]))}
+
+    def set_named(self, name, pose):
+        """Overwrite the row a named() name stands for; False when name is not one."""
+        m = _NAME.fullmatch(name)
+        if m is None or not (1 <= int(m[1]) <= len(self.poses)):
+            return False
+        self.poses[int(m[1]) - 1, 0 if m[2] else 1] = pose
+        return True
@@ -0,0 +1,32 @@
+# cancel.py
+
+import threading
+
+
+class Cancelled(RuntimeError):
+    status = "cancelled"    # Observation status finish_err records instead of "error"
+
+
+class CancelToken:
+    """
+    Set from any thread to stop a running tool call. uFactory_xArm checks it
+    between waypoints and gripper actions, so the arm stops at the next point
+    where it would come to rest, and then unwinds what the call has done.
+    """
+
+    def __init__(self, label=None):
+        self.label = label      # which call it stops, e.g. "ocp_measurement(i=1)"
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason="cancelled"):
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled(self.reason)
@@ -0,0 +1,70 @@
+# dryrun.py
+
+import math
+from simarm import SimXArmAPI, sim_ik
+
+_COSTS = ("moves", "stops", "grips", "path_mm", "kin_s")
+
+
+class DryRunArm(SimXArmAPI):
+    """
+    Accounting backend for uFactory_xArm.dry_run(). Every command completes
+    instantly on an untimed simulator while its cost is added to the open row:
+    path length, stops, gripper actions and kinematic seconds. end_step()
+    closes the row; est_s applies MotionModel coefficients to those counts,
+    charging every gripper action in full even when it overlaps a move.
+    """
+
+    def __init__(self, params, start_pose=None):
+        super().__init__("dry-run", time_scale=None, start_pose=start_pose or (423, -2.5, 185, -180, 0, 0))
+        self.params = tuple(params)
+        self.rows = []
+        self._open = dict.fromkeys(_COSTS, 0)
+
+    def _account(self, p0, kin, wait):
+        c = self._open
+        c["moves"] += 1
+        c["stops"] += bool(wait)
+        c["path_mm"] += math.dist(p0[:3], self._pose[:3])
+        c["kin_s"] += kin
+
+    def set_position(self, x=None, y=None, z=None, roll=None, pitch=None, yaw=None,
+                     radius=None, speed=None, wait=False, **kwargs):
+        p0 = list(self._pose)
+        code = super().set_position(x, y, z, roll, pitch, yaw, radius=radius, speed=speed, wait=wait, **kwargs)
+        self._account(p0, self.move_duration(p0, self._pose, speed or 100), wait)
+        return code
+
+    def set_servo_angle(self, servo_id=None, angle=None, speed=None, wait=False, **kwargs):
+        p0 = list(self._pose)
+        code = super().set_servo_angle(servo_id, angle, speed=speed, wait=wait, **kwargs)
+        self._account(p0, self.joint_move_duration(sim_ik(p0), sim_ik(self._pose), speed or 20), wait)
+        return code
+
+    def set_gripper_position(self, pos, *args, **kwargs):
+        with self._lock:
+            self._open["grips"] += 1
+        return super().set_gripper_position(pos, *args, **kwargs)
+
+    def end_step(self, label, status="ok", error=None):
+        """Close the open row under label; commands issued since the last end_step land in it."""
+        k_move, t_stop, t_grip, t_call = self.params
+        c = self._open
+        est = k_move * c["kin_s"] + t_stop * c["stops"] + t_grip * c["grips"] + t_call
+        row = {"step": label, "status": status, "error": error, **c, "est_s": est}
+        for k in ("path_mm", "kin_s", "est_s"):
+            row[k] = round(row[k], 3)
+        self.rows.append(row)
+        self._open = dict.fromkeys(_COSTS, 0)
+        return row
+
+    def pending(self):
+        return any(self._open.values())
+
+    def table(self):
+        """Per-step cost rows plus a closing "total" row."""
+        total = {"step": "total", "status": "ok" if all(r["status"] == "ok" for r in self.rows) else "error",
+                 "error": None}
+        for k in _COSTS + ("est_s",):
+            total[k] = round(sum(r[k] for r in self.rows), 3)
+        return self.rows + [total]
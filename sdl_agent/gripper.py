@@ -0,0 +1,129 @@
+# gripper.py
+
+import math
+import threading
+import time
+
+
+class GraspError(RuntimeError):
+    """A grasp closed on nothing. info is the structured record tools.py puts in the Observation."""
+
+    def __init__(self, info):
+        self.info = info
+        super().__init__(f"grasp failed at {info['location']}: jaws closed to {info['gripper_pos']}")
+
+
+class GripperController:
+    """
+    Non-blocking gripper actuation for one arm.
+
+    trigger() starts the gripper (optionally once the arm is a fraction of the
+    way along its current move) and a watcher thread sets an Event once the
+    jaws reach the target or stall on a sample. wait() blocks only for what is
+    left, so an open issued during the approach move costs nothing. A command
+    that fails in the watcher is raised from wait(). Timing is accumulated in
+    stats for the metrics channel.
+    """
+
+    def __init__(self, arm, poll=0.02, tol=10, stall_tol=1.0, stall_polls=3):
+        self.arm = arm
+        self.poll = poll
+        self.tol = tol
+        self.stall_tol = stall_tol
+        self.stall_polls = stall_polls
+        self._done = threading.Event()
+        self._done.set()
+        self._t_trigger = self._t_done = 0.0
+        self._stalled = False
+        self._timeout = 2.0
+        self._error = None          # what failed in the watcher, raised by wait()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"grip_actions": 0, "grip_time_s": 0.0, "grip_wait_s": 0.0, "grip_wait_removed_s": 0.0}
+
+    def trigger(self, pos, speed=2000, target=None, at=0.0, timeout=2.0):
+        """Start moving the jaws to pos. With target/at, fire once the arm has covered `at` of the way to target."""
+        self._done.clear()
+        self._error = None
+        threading.Thread(target=self._watch, args=(pos, speed, target, at, timeout), daemon=True).start()
+        return self._done
+
+    def _progress(self, start, target):
+        code, cur = self.arm.get_position(is_radian=False)
+        total = math.dist(start[:3], target[:3])
+        if code not in (0, None) or total <= 0:
+            return 1.0
+        return 1.0 - math.dist(cur[:3], target[:3]) / total
+
+    def _watch(self, pos, speed, target, at, timeout):
+        arm = self.arm
+        try:
+            if target is not None and at > 0:
+                _, start = arm.get_position(is_radian=False)
+                t_end = time.time() + 30.0
+                while self._progress(start, target) < at and time.time() < t_end:
+                    time.sleep(self.poll)
+            self._t_trigger = time.time()
+            self._timeout = timeout
+            self._stalled = False
+            self._check("set_gripper_enable", arm.set_gripper_enable(True))
+            self._check("set_gripper_mode", arm.set_gripper_mode(0))
+            self._check("set_gripper_speed", arm.set_gripper_speed(speed))
+            # Where the jaws are, not where they were last sent: a grasp stops short of its target.
+            code, first = arm.get_gripper_position()
+            first = first if code in (0, None) else None
+            last, still = None, 0
+            self._check("set_gripper_position", arm.set_gripper_position(pos, speed=speed, wait=False))
+            while time.time() - self._t_trigger < timeout:
+                code, cur = arm.get_gripper_position()
+                if code in (0, None):
+                    cur = cur or 0
+                    if abs(cur - pos) < self.tol:
+                        break
+                    first = cur if first is None else first
+                    # Jaws that moved away from first and then stopped short are holding something;
+                    # ones that have not started moving yet are not.
+                    if last is not None and abs(cur - last) < self.stall_tol and abs(cur - first) >= self.stall_tol:
+                        still += 1
+                        if still >= self.stall_polls:
+                            self._stalled = True
+                            break
+                    else:
+                        still = 0
+                    last = cur
+                time.sleep(self.poll)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._t_done = time.time()
+            self._done.set()
+
+    @staticmethod
+    def _check(name, code):
+        if code not in (0, None):
+            raise RuntimeError(f"{name} failed: {code}")
+
+    def holding(self, pos):
+        """(held, jaw position) after closing towards pos: jaws that stopped short of it hold something."""
+        code, cur = self.arm.get_gripper_position()
+        if code not in (0, None) or cur is None:
+            return True, None       # cannot tell; leave it to the next check
+        return cur - pos >= self.tol, cur
+
+    def wait(self, timeout=None):
+        """Block until the last actuation completes; returns the seconds spent blocking, or raises what failed."""
+        t0 = time.time()
+        self._done.wait(timeout)
+        blocked = time.time() - t0
+        actuation = self._t_done - self._t_trigger
+        # The old sleep loop waited the full actuation, or the whole timeout when it stalled.
+        baseline = self._timeout if self._stalled else actuation
+        self.stats["grip_actions"] += 1
+        self.stats["grip_time_s"] += actuation
+        self.stats["grip_wait_s"] += blocked
+        self.stats["grip_wait_removed_s"] += max(baseline - blocked, 0.0)
+        if self._error is not None:
+            err, self._error = self._error, None
+            raise err
+        return blocked
@@ -0,0 +1,99 @@
+# ikcache.py
+
+import json, os
+from pathlib import Path
+from simarm import SimXArmAPI
+
+
+def controller_id(arm):
+    """Which controller a solution belongs to: "sim" for simulators and dry runs, else its serial number or address."""
+    a = arm
+    while a is not None:
+        if isinstance(a, SimXArmAPI):
+            return "sim"
+        a = getattr(a, "_arm", None)
+    sn = getattr(arm, "sn", None)
+    if not sn and hasattr(arm, "get_robot_sn"):
+        code, sn = arm.get_robot_sn()
+        sn = sn if code in (0, None) else None
+    return sn or getattr(arm, "port", None)
+
+
+class IKCache:
+    """
+    Joint targets for named poses, solved once on the controller and kept on
+    disk. Entries are keyed by controller (controller_id) and pose name and
+    remember the pose they were solved for, so editing the pose table re-solves
+    only the poses that changed and one controller's solutions are never sent
+    to another. A cached solution is checked with forward kinematics on the
+    live controller before its first use; one that no longer lands on its pose
+    is solved again. Controllers without an id are solved but not saved.
+    """
+
+    def __init__(self, path, tol_mm=0.5, tol_deg=0.5):
+        self.path = Path(path)
+        self.tol_mm = tol_mm
+        self.tol_deg = tol_deg
+        self._entries = None
+        self._unsaved = {}          # name -> entry for a controller without an id
+        self._verified = set()      # (controller, name) checked against this process's controller
+        self._arm = self._id = None
+        self.solved = 0
+        self.rejected = 0           # cached solutions forward kinematics disagreed with
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = {}
+            # Entries from before controller keying cannot say whose they are.
+            self._entries = {k: v for k, v in data.items() if isinstance(v, dict) and "pose" not in v}
+        return self._entries
+
+    def _save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def _controller(self, arm):
+        if arm is not self._arm:
+            self._arm, self._id = arm, controller_id(arm)
+        return self._id
+
+    def _reaches(self, arm, joints, pose):
+        code, fk = arm.get_forward_kinematics(joints, input_is_radian=False, return_is_radian=False)
+        if code not in (0, None) or fk is None:
+            return False
+        return (all(abs(a - b) <= self.tol_mm for a, b in zip(fk[:3], pose[:3]))
+                and all(abs((a - b + 180) % 360 - 180) <= self.tol_deg for a, b in zip(fk[3:6], pose[3:6])))
+
+    def joints(self, arm, name, pose):
+        ident = self._controller(arm)
+        pose = [float(v) for v in pose[:6]]
+        entries = self._load().setdefault(ident, {}) if ident else self._unsaved
+        e = entries.get(name)
+        if e is not None and e["pose"] == pose:
+            if (ident, name) in self._verified:
+                return e["joints"]
+            if self._reaches(arm, e["joints"], pose):
+                self._verified.add((ident, name))
+                return e["joints"]
+            self.rejected += 1
+        code, angles = arm.get_inverse_kinematics(pose, input_is_radian=False, return_is_radian=False)
+        if code not in (0, None):
+            raise RuntimeError(f"get_inverse_kinematics failed for {name}: {code}")
+        entries[name] = {"pose": pose, "joints": [float(a) for a in angles]}
+        self._verified.add((ident, name))
+        self.solved += 1
+        if ident:
+            self._save()
+        return entries[name]["joints"]
+
+    def clear(self):
+        self._entries, self._unsaved = {}, {}
+        self._verified.clear()
+        if self.path.exists():
+            self.path.unlink()
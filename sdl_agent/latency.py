@@ -0,0 +1,124 @@
+# latency.py
+
+import json, threading, time
+from collections import Counter, defaultdict
+from shadow import _code_of
+
+_SUB_BITS = 7               # 128 linear buckets, then 64 per power of two: <= 1/64 relative error
+_HALF = 1 << (_SUB_BITS - 1)
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of integer microseconds. Recording is a
+    couple of integer operations and a list increment; percentiles report the
+    highest value equivalent to the bucket they fall in.
+    """
+
+    def __init__(self):
+        self.counts = []
+        self.n = self.total = 0
+        self.min = self.max = None
+
+    @staticmethod
+    def _index(v):
+        if v < 2 * _HALF:
+            return v
+        e = v.bit_length() - _SUB_BITS
+        return 2 * _HALF + (e - 1) * _HALF + (v >> e) - _HALF
+
+    @staticmethod
+    def _bounds(i):
+        if i < 2 * _HALF:
+            return i, i
+        e, m = divmod(i - 2 * _HALF, _HALF)
+        lo = (m + _HALF) << (e + 1)
+        return lo, lo + (1 << (e + 1)) - 1
+
+    def record(self, us):
+        us = max(int(us), 0)
+        i = self._index(us)
+        if i >= len(self.counts):
+            self.counts.extend([0] * (i + 1 - len(self.counts)))
+        self.counts[i] += 1
+        self.n += 1
+        self.total += us
+        self.min = us if self.min is None else min(self.min, us)
+        self.max = us if self.max is None else max(self.max, us)
+
+    def percentile(self, q):
+        if not self.n:
+            return None
+        rank, seen = max(1, round(q / 100 * self.n)), 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self._bounds(i)[1], self.max)
+        return self.max
+
+    def summary(self):
+        """{n, mean, p50, p95, p99, max} in milliseconds."""
+        if not self.n:
+            return {"n": 0}
+        ms = lambda us: round(us / 1000, 3)
+        return {"n": self.n, "mean": ms(self.total / self.n), "p50": ms(self.percentile(50)),
+                "p95": ms(self.percentile(95)), "p99": ms(self.percentile(99)), "max": ms(self.max)}
+
+    def buckets(self):
+        """[[low_us, high_us, count]] for the non-empty buckets, for merging dumps later."""
+        return [[*self._bounds(i), c] for i, c in enumerate(self.counts) if c]
+
+
+class LatencyArm:
+    """
+    Wraps an XArmAPI handle and times every call made through it. Per command
+    it keeps histograms of wall time and of blocked time (wall minus this
+    thread's CPU time, i.e. waiting on the controller or the motion rather
+    than running Python), plus a count of return codes. Blocking calls
+    (wait=True) are kept apart as "<name>:wait" since they include the motion.
+    """
+
+    def __init__(self, arm):
+        self._arm = arm
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wall = defaultdict(Histogram)
+            self.blocked = defaultdict(Histogram)
+            self.codes = defaultdict(Counter)
+            self.t_start = time.time()
+
+    def _call(self, name, fn, args, kwargs):
+        c0, t0 = time.thread_time_ns(), time.perf_counter_ns()
+        ret = fn(*args, **kwargs)
+        wall, cpu = time.perf_counter_ns() - t0, time.thread_time_ns() - c0
+        key = f"{name}:wait" if kwargs.get("wait") else name
+        with self._lock:
+            self.wall[key].record(wall // 1000)
+            self.blocked[key].record(max(wall - cpu, 0) // 1000)
+            self.codes[key][_code_of(ret)] += 1
+        return ret
+
+    def report(self):
+        """Per command: calls, return codes and wall/blocked ms p50/p95/p99."""
+        with self._lock:
+            return {k: {"codes": {str(c): n for c, n in self.codes[k].items()},
+                        "wall_ms": h.summary(), "blocked_ms": self.blocked[k].summary()}
+                    for k, h in sorted(self.wall.items())}
+
+    def dump(self, path):
+        with self._lock:
+            hist = {k: {"wall_us": h.buckets(), "blocked_us": self.blocked[k].buckets()}
+                    for k, h in sorted(self.wall.items())}
+        out = {"t_start": self.t_start, "t_end": time.time(), "commands": self.report(), "histograms": hist}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=1)
+        return out
+
+    def __getattr__(self, name):
+        attr = getattr(self._arm, name)
+        if not callable(attr):
+            return attr
+        return lambda *a, **kw: self._call(name, attr, a, kw)
@@ -0,0 +1,116 @@
+# macros.py
+
+import inspect
+from collections import Counter
+from robotmotion import uFactory_xArm
+from motionprogram import Grip
+from motionmodel import MEASURE, TOOL_CHAINS, primitive_program, compiled, load_observations, log_paths
+
+U = uFactory_xArm
+
+
+def mine(sequences, min_len=2, min_count=2):
+    """
+    Frequent runs of primitives in (chain, weight) pairs, never spanning a
+    MEASURE. Returns {primitives: count}, dropping a run when a longer one
+    containing it is just as frequent.
+    """
+    counts = Counter()
+    for chain, weight in sequences:
+        part = []
+        for p in list(chain) + [MEASURE]:
+            if p != MEASURE:
+                part.append(p)
+                continue
+            for n in range(min_len, len(part) + 1):
+                for k in range(len(part) - n + 1):
+                    counts[tuple(part[k:k + n])] += weight
+            part = []
+    frequent = {s: c for s, c in counts.items() if c >= min_count}
+    return {s: c for s, c in frequent.items()
+            if not any(len(t) > len(s) and c2 == c and any(t[k:k + len(s)] == s for k in range(len(t) - len(s) + 1))
+                       for t, c2 in frequent.items())}
+
+
+class MacroLibrary:
+    """
+    Named runs of mid-level primitives fused into one motion program: the
+    programs are concatenated before optimize() and blending, so the arm does
+    not stop between them and redundant returns to offsethome drop out. Each
+    fused program is compiled and pre-flight checked once per slot and then
+    served from uFactory_xArm.ROUTES.
+
+        MACROS = MacroLibrary.from_logs()      # or from_workflows()
+        MACROS.chain("pick_sample_from_bed", "place_sample_to_measurementstation", i=3)
+    """
+
+    def __init__(self, macros=None):
+        self.macros = {}        # name -> primitives
+        self.calls = Counter()
+        for prims in macros or ():
+            self.declare(prims)
+
+    @classmethod
+    def from_workflows(cls, chains=None):
+        """Every fusable run in the declared tool chains (default TOOL_CHAINS)."""
+        return cls(mine(((c, 1) for c in (chains or TOOL_CHAINS).values()), min_count=1))
+
+    @classmethod
+    def from_logs(cls, log_dir=None, min_count=2):
+        """Runs that recur at least min_count times across the tool calls logged in log_dir (default store.BASE_DIR)."""
+        tools = Counter(t for t, _, _ in load_observations(log_paths(log_dir)))
+        return cls(mine(((TOOL_CHAINS[t], n) for t, n in tools.items() if t in TOOL_CHAINS), min_count=min_count))
+
+    def declare(self, primitives, name=None):
+        for p in primitives:
+            if not hasattr(U, f"plan_{p}"):
+                raise ValueError(f"unknown primitive: {p}")
+        name = name or "+".join(primitives)
+        self.macros[name] = tuple(primitives)
+        return name
+
+    def program(self, name, i=None):
+        """Unfused concatenation of the macro's primitive programs."""
+        return [step for p in self.macros[name] for step in primitive_program(p, i)]
+
+    def run(self, name, i=None):
+        print(f"Running {name.replace('+', ' + ')}" + (f" for sample {i}..." if i is not None else "..."))
+        self.calls[name] += 1
+        U.run(self.program(name, i), route=f"macro:{name}:{i}")
+
+    def chain(self, *primitives, i=None):
+        """Run primitives as one fused macro when the library has them, else one by one."""
+        name = "+".join(primitives)
+        if name in self.macros:
+            return self.run(name, i)
+        for p in primitives:
+            fn = getattr(U, p)
+            fn(i) if "i" in inspect.signature(fn).parameters else fn()
+
+    def report(self, model=None, i=1):
+        """
+        Estimated seconds per macro, fused against running its primitives one
+        by one (each a separate program that ends at rest), from MotionModel.
+        """
+        model = model or U.motion_model()
+        rows = []
+        for name, prims in self.macros.items():
+            loaded, unfused, stops, pose = False, 0.0, 0, None
+            for p in prims:
+                prog = compiled(primitive_program(p, i), loaded=loaded)
+                for s in prog:
+                    if isinstance(s, Grip):
+                        loaded = s.load_after(loaded)
+                unfused += model.estimate(prog, pose)
+                stops += sum(getattr(s, "wait", False) for s in prog)
+                pose = [s.pose for s in prog if hasattr(s, "pose")][-1]
+            fused_prog = compiled(self.program(name, i))
+            fused = model.estimate(fused_prog)
+            rows.append({"macro": name, "calls": self.calls[name],
+                         "stops_unfused": stops, "stops_fused": sum(getattr(s, "wait", False) for s in fused_prog),
+                         "unfused_s": round(unfused, 3), "fused_s": round(fused, 3),
+                         "saved_s": round(unfused - fused, 3), "speedup": round(unfused / fused, 3) if fused else None})
+        return rows
+
+
+MACROS = MacroLibrary.from_workflows()
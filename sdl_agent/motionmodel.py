@@ -0,0 +1,207 @@
+# motionmodel.py
+
+import csv, inspect, json
+from pathlib import Path
+from robotmotion import uFactory_xArm
+from motionprogram import Move, Grip, Sync
+from simarm import SimXArmAPI, sim_ik
+from store import BASE_DIR
+
+U = uFactory_xArm
+
+MEASURE = "|"   # instrument step in a chain; nothing is fused across it
+
+# Mid-level primitives each tools.py call runs, in order. tool_program() and
+# the macro library both read this one table.
+TOOL_CHAINS = {
+    "ocp_measurement": ("pick_sample_from_bed", "place_sample_to_measurementstation", MEASURE,
+                        "pick_sample_from_measurementstation", "place_sample_to_bed"),
+    "bring_sample_to_user": ("pick_sample_from_bed", "place_sample_to_userarea"),
+    "collect_sample_from_user": ("pick_sample_from_userarea", "place_sample_to_bed"),
+    "go_home": ("go_home",),
+}
+TOOL_CHAINS["ca_measurement"] = TOOL_CHAINS["cv_measurement"] = TOOL_CHAINS["ocp_measurement"]
+
+
+def _takes_i(primitive):
+    return "i" in inspect.signature(getattr(U, f"plan_{primitive}")).parameters
+
+
+def primitive_program(primitive, i=None, poses=None):
+    """Motion program of one mid-level primitive, e.g. primitive_program("pick_sample_from_bed", 3)."""
+    plan = getattr(U, f"plan_{primitive}")
+    return plan(i, poses) if _takes_i(primitive) else plan(poses)
+
+
+def tool_program(tool, args=None, poses=None):
+    """Motion program a tools.py call runs, e.g. tool_program("ocp_measurement", {"i": 3})."""
+    args = dict(args or {})
+    i = args.pop("i", None)
+    chain = TOOL_CHAINS[tool]
+    if args or (i is not None) != any(_takes_i(p) for p in chain if p != MEASURE):
+        raise TypeError(f"{tool}: bad arguments {args or {'i': i}}")
+    return [step for p in chain
+            for step in ([Sync("measure")] if p == MEASURE else primitive_program(p, i, poses))]
+
+
+class _Scratch:
+    # Context stand-in for compile(): its own load state and gain counter, the
+    # rest read through to the poses it was given.
+    def __init__(self, poses, loaded):
+        self._poses, self.loaded, self.load_gain_s = poses, loaded, 0.0
+
+    def __getattr__(self, name):
+        return getattr(self._poses, name)
+
+
+def compiled(plan, poses=None, loaded=False):
+    """
+    plan as uFactory_xArm.compile() hands it to _exec, starting with the
+    gripper loaded or not. Compiled against a scratch context, so estimating
+    leaves the arm's load state and metrics alone.
+    """
+    return U.compile(plan, _Scratch(poses or U.context(), loaded))
+
+
+def log_paths(log_dir=None):
+    """CSV and JSONL experiment logs in log_dir, by default the store's BASE_DIR."""
+    d = BASE_DIR if log_dir is None else Path(log_dir)
+    return sorted(d.glob("*.csv")) + sorted(d.glob("*.jsonl"))
+
+
+def load_observations(paths, max_duration=600.0):
+    """
+    Successful tool calls from experiment logs (CSV or JSONL) as (tool, args, duration_s).
+    Records longer than max_duration (paused or hand-edited runs) or whose args
+    do not plan on this cell, or plan outside its WORKSPACE, are dropped.
+    """
+    out = []
+    for path in paths:
+        path = Path(path)
+        with open(path, encoding="utf-8") as f:
+            rows = csv.DictReader(f) if path.suffix == ".csv" else (json.loads(l) for l in f if l.strip())
+            for row in rows:
+                meta = row.get("meta") or {}
+                if isinstance(meta, str):
+                    meta = json.loads(meta or "{}")
+                if meta.get("status") != "ok" or meta.get("tool") not in TOOL_CHAINS:
+                    continue
+                try:
+                    d = float(row["duration_s"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                args = meta.get("args") or {}
+                try:
+                    compiled(tool_program(meta["tool"], args))
+                except (TypeError, ValueError):
+                    continue    # args this cell cannot plan, e.g. pool-wide sample ids
+                if 0 < d <= max_duration:
+                    out.append((meta["tool"], args, d))
+    return out
+
+
+def _solve(a, b):
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for c in range(n):
+        piv = max(range(c, n), key=lambda r: abs(m[r][c]))
+        m[c], m[piv] = m[piv], m[c]
+        if abs(m[c][c]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != c:
+                f = m[r][c] / m[c][c]
+                m[r] = [x - f * y for x, y in zip(m[r], m[c])]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) > 1e-12 else 0.0 for i in range(n)]
+
+
+class MotionModel:
+    """
+    Segment-level motion time model.
+
+        t = k_move * kinematic_time + t_stop * stops + t_grip * grips + t_call
+
+    kinematic_time comes from the simulator's trapezoidal profiles for each
+    (from pose, to pose, speed) segment; the four coefficients are fitted to
+    logged Observation.duration_s. Segment times are memoised, so estimate()
+    is a handful of dict lookups per waypoint.
+    """
+
+    PRIOR = (1.0, 0.15, 0.6, 0.0)
+
+    def __init__(self, params=None):
+        self.params = tuple(params or self.PRIOR)
+        self._kin = SimXArmAPI()
+        self._seg = {}
+
+    def _kinematic(self, p0, step):
+        if step.joint:
+            return self._kin.joint_move_duration(sim_ik(p0), sim_ik(step.pose), step.speed)
+        return self._kin.move_duration(p0, step.pose, step.speed)
+
+    def features(self, plan, start=None):
+        """(kinematic_s, stops, grips, 1) for a program, starting at `start` (default offsethome)."""
+        pose = tuple(start or U.offsethome[:6])
+        kin = stops = grips = 0.0
+        for step in plan:
+            if isinstance(step, Sync):
+                continue
+            if isinstance(step, Grip):
+                grips += not step.overlap
+                continue
+            kin += self._kinematic(pose, step)
+            stops += step.wait
+            pose = step.pose
+        return kin, stops, grips, 1.0
+
+    def fit(self, observations, ridge=10.0):
+        """
+        Fit coefficients to (tool, args, duration_s) records. The logs only hold
+        a few distinct tool shapes, so a per-record ridge pulls towards PRIOR.
+        Features come from the compiled programs, whose stops are the ones the
+        arm actually made.
+        """
+        rows = [(self.features(compiled(tool_program(t, a))), d) for t, a, d in observations]
+        if not rows:
+            return self
+        n = len(self.PRIOR)
+        lam = ridge * len(rows)
+        xtx = [[lam * (i == j) for j in range(n)] for i in range(n)]
+        xty = [lam * p for p in self.PRIOR]
+        for x, y in rows:
+            for i in range(n):
+                xty[i] += x[i] * y
+                for j in range(n):
+                    xtx[i][j] += x[i] * x[j]
+        self.params = tuple(max(p, 0.0) for p in _solve(xtx, xty))
+        self._seg.clear()
+        return self
+
+    @classmethod
+    def from_logs(cls, log_dir=None):
+        return cls().fit(load_observations(log_paths(log_dir)))
+
+    def segment_time(self, p0, step):
+        key = (p0, step.pose, step.speed, step.joint, step.wait)
+        t = self._seg.get(key)
+        if t is None:
+            k_move, t_stop = self.params[:2]
+            t = self._seg[key] = k_move * self._kinematic(p0, step) + t_stop * step.wait
+        return t
+
+    def estimate(self, plan, start=None):
+        """Predicted seconds for a motion program, without touching the arm."""
+        t_grip, t_call = self.params[2:]
+        pose = tuple(start or U.offsethome[:6])
+        total = t_call
+        for step in plan:
+            if isinstance(step, Move):
+                total += self.segment_time(pose, step)
+                pose = step.pose
+            elif isinstance(step, Grip) and not step.overlap:
+                total += t_grip
+        return total
+
+    def estimate_tools(self, calls):
+        """Predicted seconds for a queue of tools.py calls given as (tool, args)."""
+        return sum(self.estimate(compiled(tool_program(t, a))) for t, a in calls)
@@ -0,0 +1,219 @@
+# motionprogram.py
+
+from dataclasses import dataclass, field, replace
+
+GRIP_HALF = 65      # midpoint of the 0 (closed) .. 130 (open) travel robotmotion uses
+
+
+@dataclass(frozen=True)
+class Move:
+    """
+    Waypoint. radius=None stops at the pose, wait=False returns immediately.
+    joint=True reaches the pose with a joint-space move; speed is then in deg/s
+    and mvacc in deg/s^2. mvacc=None keeps the controller default. call is the
+    queued tools.py call the step belongs to inside batch(), see
+    uFactory_xArm.defer(); it takes no part in comparisons.
+    """
+    name: str | None
+    pose: tuple
+    speed: float
+    radius: float | None = None
+    wait: bool = True
+    joint: bool = False
+    mvacc: float | None = None
+    call: object = field(default=None, compare=False, repr=False)
+
+
+@dataclass(frozen=True)
+class Grip:
+    """
+    Gripper target. grasp=True marks the close that picks a sample up.
+    overlap=True starts it during the preceding move, once `at` of the way there.
+    call is as for Move.
+    """
+    pos: float
+    speed: int = 2000
+    grasp: bool = False
+    overlap: bool = False
+    at: float = 0.0
+    call: object = field(default=None, compare=False, repr=False)
+
+    @property
+    def closing(self):
+        return self.pos < GRIP_HALF
+
+    def load_after(self, loaded):
+        """Whether the gripper holds a sample after this action: a grasp loads, an open unloads."""
+        return True if self.grasp else (loaded if self.closing else False)
+
+
+@dataclass(frozen=True)
+class Sync:
+    """Barrier where the arm must be at rest, e.g. an instrument step. Nothing is optimized across it."""
+    label: str = ""
+
+
+def _same_pose(a, b, tol=1e-3):
+    return all(abs(x - y) <= tol for x, y in zip(a.pose, b.pose))
+
+
+def _drop_duplicate_waypoints(prog):
+    # A move to the pose the arm is already heading for does nothing. Grips in
+    # between do not move the arm, so they do not break the match.
+    out, last = [], None
+    for step in prog:
+        if isinstance(step, Move):
+            if last is not None and _same_pose(out[last], step):
+                if step.wait and not out[last].wait:
+                    out[last] = replace(out[last], wait=True, radius=None)
+                continue
+            last = len(out)
+        out.append(step)
+    return out
+
+
+def _drop_needless_returns(prog):
+    # A -> B -> A collapses to A when nothing happens at B. Grips at A before
+    # leaving are fine, the arm is back where it did them.
+    out = list(prog)
+    i = 1
+    while i + 1 < len(out):
+        b, c = out[i], out[i + 1]
+        p = i - 1
+        while p >= 0 and isinstance(out[p], Grip):
+            p -= 1
+        if p >= 0 and isinstance(b, Move) and isinstance(c, Move) and _same_pose(out[p], c):
+            if c.wait and not out[p].wait:
+                out[p] = replace(out[p], wait=True, radius=None)
+            del out[i:i + 2]
+            i = max(p, 1)
+            continue
+        i += 1
+    return out
+
+
+def _cancel_grip_pairs(prog):
+    # An empty-handed close followed by an open, with only moves in between,
+    # leaves the gripper where it was. So do a repeated open and a release
+    # that is immediately re-grasped in place.
+    out = list(prog)
+    holding = False
+    i = 0
+    while i < len(out):
+        g = out[i]
+        if isinstance(g, Grip):
+            j = i + 1
+            while j < len(out) and isinstance(out[j], Move):
+                j += 1
+            nxt = out[j] if j < len(out) else None
+            if isinstance(nxt, Grip):
+                if not nxt.closing and g.closing and not g.grasp:
+                    del out[j]; del out[i]
+                    continue
+                if not nxt.closing and not g.closing:
+                    del out[j]
+                    continue
+                if nxt.grasp and not g.closing and holding and j == i + 1:
+                    del out[j]; del out[i]
+                    continue
+            holding = g.grasp or (holding and g.closing)
+        i += 1
+    return out
+
+
+PASSES = (_drop_duplicate_waypoints, _cancel_grip_pairs, _drop_needless_returns)
+
+
+def optimize(prog):
+    """Peephole-optimize a motion program until no pass changes it."""
+    out, chunk = [], []
+    for step in prog:
+        if isinstance(step, Sync):
+            out += _optimize_chunk(chunk) + [step]
+            chunk = []
+        else:
+            chunk.append(step)
+    return out + _optimize_chunk(chunk)
+
+
+def _optimize_chunk(prog):
+    while True:
+        before = prog
+        for p in PASSES:
+            prog = p(prog)
+        if prog == before:
+            return prog
+
+
+def segment_profile(profiles, src, dst):
+    """Look up a segment's settings by (from, to) name, then by target name, then "*"."""
+    for key in ((src, dst), dst, "*"):
+        if key in profiles:
+            return profiles[key]
+    return {}
+
+
+def compile_blended(prog, profiles=None, radius=20, start=None):
+    """
+    Turn a program into one non-blocking, blended command stream. The arm only
+    comes to rest before a gripper action and at the end of the program, where
+    the caller hands over to an instrument or the next request. profiles map
+    segments to {"radius": mm, "speed": mm/s}; radius 0 forces a stop.
+    """
+    profiles = profiles or {}
+    out, src = [], start
+    for k, step in enumerate(prog):
+        if isinstance(step, Move):
+            nxt = prog[k + 1] if k + 1 < len(prog) else None
+            prof = segment_profile(profiles, src, step.name)
+            r = prof.get("radius", radius)
+            sync = not isinstance(nxt, Move) or not r
+            step = replace(step, speed=prof.get("speed", step.speed),
+                           radius=None if sync else r, wait=sync)
+            src = step.name
+        out.append(step)
+    return out
+
+
+def unwind_program(done, loaded=False):
+    """
+    Program that undoes the executed steps `done`: it retraces each move back to
+    the pose before it and reverses each gripper action where it happened, so a
+    grasp becomes a release and a release of a held sample a re-grasp. loaded
+    is the gripper load before `done`. Ends at the first move of `done`.
+    """
+    before, prev, last = [], {}, None
+    for k, step in enumerate(done):
+        before.append(loaded)
+        if isinstance(step, Grip):
+            loaded = step.load_after(loaded)
+        elif isinstance(step, Move):
+            prev[k], last = last, step
+    out = []
+    for k in range(len(done) - 1, -1, -1):
+        step = done[k]
+        if isinstance(step, Grip):
+            out.append(Grip(130 if step.closing else 0, step.speed, grasp=not step.closing and before[k]))
+        elif isinstance(step, Move) and prev[k] is not None:
+            # Back along the same segment: the speed and joint/Cartesian kind it came in with.
+            p = prev[k]
+            out.append(replace(step, name=p.name, pose=p.pose, radius=None, wait=True, mvacc=None))
+    return out
+
+
+def apply_load_profiles(prog, profiles, loaded=False):
+    """
+    Rescale moves by whether the gripper holds a sample when they start. profiles:
+    {"empty" | "loaded": {"speed": factor, "mvacc": mm/s^2, "joint_mvacc": deg/s^2}}.
+    Returns (program, loaded state at the end).
+    """
+    out = []
+    for step in prog:
+        if isinstance(step, Grip):
+            loaded = step.load_after(loaded)
+        elif isinstance(step, Move):
+            prof = profiles.get("loaded" if loaded else "empty") or {}
+            acc = prof.get("joint_mvacc" if step.joint else "mvacc", step.mvacc)
+            step = replace(step, speed=step.speed * prof.get("speed", 1.0), mvacc=acc)
+        out.append(step)
+    return out, loaded
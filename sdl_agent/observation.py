@@ -28,8 +28,10 @@ def finish_ok(obs:Observation, feature=None, sample=None, value=None, metrics=No
     return obs
 
 def finish_err(obs:Observation, err:Exception) -> Observation:
-    obs.meta["status"] = "error"
+    obs.meta["status"] = getattr(err, "status", "error")
     obs.meta["error"] = str(err)
+    if getattr(err, "info", None):
+        obs.meta["error_info"] = err.info
     obs.t_end = time(); obs.duration_s = obs.t_end - (obs.t_start or obs.t_end)
     return obs
 
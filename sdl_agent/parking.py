@@ -0,0 +1,109 @@
+# parking.py
+
+import threading
+from collections import Counter, deque
+from motionprogram import Move
+
+
+class ParkingPolicy:
+    """
+    Where the arm waits between requests. After idle_s without a command it
+    moves (via offsethome) to the safe pre-position with the lowest expected
+    time to the first real waypoint of the next tool call: the next call in
+    `pending` when one is known, otherwise the mix of past calls in `counts`.
+    Candidates are offsethome and the bed approach poses; nothing is parked
+    while a sample is held.
+
+    uFactory_xArm.run() starts the next program from the parked pose, so the
+    optimizer drops its leading offsethome detour when the guess was right.
+    """
+
+    def __init__(self, idle_s=3.0, history=None):
+        self.idle_s = idle_s
+        self.counts = Counter(history or ())    # (tool, i) -> calls seen
+        self.pending = deque()                  # (tool, i) known to come next
+        self.parks = 0
+        self._timer = None
+        self._seq = 0       # bumped by arm() and cancel(); a park carrying an older one is stale
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_logs(cls, log_dir=None, **kwargs):
+        # log_dir defaults to the store's BASE_DIR.
+        from motionmodel import load_observations, log_paths
+        return cls(history=[(t, a.get("i")) for t, a, _ in load_observations(log_paths(log_dir))], **kwargs)
+
+    def expect(self, tool, i=None):
+        self.pending.append((tool, i))
+
+    def observe(self, tool, i=None):
+        self.counts[(tool, i)] += 1
+        if self.pending and self.pending[0] == (tool, i):
+            self.pending.popleft()
+
+    # ----- choosing a pose -----
+
+    @staticmethod
+    def first_target(tool, i, U):
+        """First waypoint of a tool call after its leading offsethome."""
+        from motionmodel import tool_program
+        moves = [s for s in tool_program(tool, {} if i is None else {"i": i}) if isinstance(s, Move)]
+        if len(moves) > 1 and moves[0].name == "offsethome":
+            return moves[1]
+        return moves[0]
+
+    @staticmethod
+    def _cost(src, dst, U, kin):
+        # Seconds from a parked pose to dst when the program starts with offsethome.
+        if all(abs(a - b) <= 1e-3 for a, b in zip(src.pose, dst.pose)):
+            return 0.0
+        off = U._mv("offsethome")
+        return kin(src, off) + kin(off, dst)
+
+    def target(self, current, U, kin):
+        """Best parking Move, or None when staying at `current` is as good."""
+        if self.pending:
+            mix = {self.pending[0]: 1}
+        else:
+            mix = {k: n for k, n in self.counts.items() if n}
+        if not mix:
+            return None
+        nxt = []
+        for (tool, i), n in mix.items():
+            try:
+                nxt.append((self.first_target(tool, i, U), n))
+            except (KeyError, TypeError, ValueError):
+                continue        # tools or slots this cell no longer has
+        if not nxt:
+            return None
+        candidates = [U._mv("offsethome")] + [U._slot(i)[0] for i in range(1, len(U.BED) + 1)]
+
+        def expected(src):
+            return sum(n * self._cost(src, dst, U, kin) for dst, n in nxt)
+
+        best = min(candidates, key=expected)
+        return best if expected(best) < expected(current) - 1e-6 else None
+
+    # ----- idle timer -----
+
+    def arm(self, park):
+        """Call park(seq) after idle_s unless cancel() comes first."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._seq += 1
+            self._timer = threading.Timer(self.idle_s, park, (self._seq,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        # A timer that has already fired keeps running; current() tells its park() to give up.
+        with self._lock:
+            self._seq += 1
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def current(self, seq):
+        with self._lock:
+            return seq == self._seq
@@ -0,0 +1,152 @@
+# pool.py
+
+import queue, threading, time
+from concurrent.futures import Future
+from collections import Counter
+from robotmotion import uFactory_xArm, ArmContext
+from motionmodel import TOOL_CHAINS
+from gripper import GripperController
+from bed import Bed
+from simarm import SimXArmAPI
+from shadow import ShadowArm
+import tools
+
+
+class ArmHandle(ArmContext):
+    """
+    One xArm cell: its own controller handle, gripper, IK cache and pose table.
+
+    Pose names match uFactory_xArm and are copied from it unless overridden, so
+    every plan_* method works against a handle via poses=handle; sample{i}
+    and sample{i}above set its bed's slots. bed defaults to
+    uFactory_xArm.BED; samples maps pool-wide sample ids to its slots. As an
+    ArmContext it runs the tools.py calls themselves, see run_tool().
+    """
+
+    def __init__(self, name, arm, samples=None, bed=None, **poses):
+        super().__init__(arm, uFactory_xArm.ik_cache(name))
+        self.name = name
+        self.BED = uFactory_xArm.BED if bed is None else bed
+        named = self.BED.named()
+        slots = {k: poses.pop(k) for k in list(poses) if k in named}
+        if slots:
+            self.BED = Bed(self.BED.poses.copy())       # its own, not the shared default
+            for k, v in slots.items():
+                self.BED.set_named(k, v)
+        for k, v in uFactory_xArm.pose_table().items():
+            if k not in named:
+                setattr(self, k, list(poses.pop(k, v)))
+        if poses:
+            raise ValueError(f"unknown poses for {name}: {sorted(poses)}")
+        self.grasp_failures = Counter()
+        self.gripper = GripperController(arm)
+        self.samples = dict(samples or {})
+        self.busy_s = 0.0
+        self.jobs = 0
+
+    def slot(self, i):
+        return self.samples.get(i, i)
+
+    def run(self, prog):
+        with uFactory_xArm.using(self):
+            uFactory_xArm.run(prog)
+
+    def run_tool(self, tool, **args):
+        """
+        Run a tools.py call on this cell: the same preflight, zones (prefixed
+        with the cell name), cancellation, macros and logging as a direct call.
+        """
+        t0 = time.time()
+        try:
+            with uFactory_xArm.using(self):
+                return getattr(tools, tool)(**args)
+        finally:
+            self.busy_s += time.time() - t0
+            self.jobs += 1
+
+
+class ArmPool:
+    """
+    Dispatcher over several ArmHandles. A job touching sample i goes to the
+    cell that owns it; jobs without a sample go to whichever cell is free.
+    Each cell runs its jobs FIFO on its own worker thread.
+    """
+
+    def __init__(self, handles):
+        self.handles = {h.name: h for h in handles}
+        self._owned = {h.name: queue.Queue() for h in handles}
+        self._shared = queue.Queue()
+        self._stop = threading.Event()
+        self._t0 = time.time()
+        self._workers = [threading.Thread(target=self._work, args=(h,), daemon=True) for h in handles]
+        for w in self._workers:
+            w.start()
+
+    @classmethod
+    def simulated(cls, n, slots=None, time_scale=None, shadow=True):
+        """n simulated cells; cell k owns samples k*slots+1 .. (k+1)*slots (slots defaults to the bed size)."""
+        slots = slots or len(uFactory_xArm.BED)
+        handles = []
+        for k in range(n):
+            arm = SimXArmAPI(f"sim{k}", time_scale=time_scale, samples=uFactory_xArm.BED.poses[:slots, 1, :3])
+            if shadow:
+                arm = ShadowArm(arm)
+            arm.motion_enable(True); arm.set_mode(0); arm.set_state(0)
+            samples = {k * slots + s: s for s in range(1, slots + 1)}
+            handles.append(ArmHandle(f"arm{k}", arm, samples))
+        return cls(handles)
+
+    def owner(self, i):
+        for h in self.handles.values():
+            if i in h.samples:
+                return h
+        return None
+
+    def submit(self, tool, **args):
+        """Queue a tools.py job, e.g. submit("ocp_measurement", i=7). Returns a Future[Observation]."""
+        if tool not in TOOL_CHAINS:
+            raise ValueError(f"unknown tool: {tool}")
+        fut = Future()
+        job = (tool, args, fut)
+        if "i" in args:
+            h = self.owner(args["i"])
+            if h is None:
+                raise ValueError(f"no arm owns sample {args['i']}")
+            self._owned[h.name].put(job)
+        else:
+            self._shared.put(job)
+        return fut
+
+    def _next(self, h):
+        for q in (self._owned[h.name], self._shared):
+            try:
+                return q.get_nowait()
+            except queue.Empty:
+                pass
+        try:
+            return self._owned[h.name].get(timeout=0.01)
+        except queue.Empty:
+            return None
+
+    def _work(self, h):
+        while not self._stop.is_set():
+            job = self._next(h)
+            if job is None:
+                continue
+            tool, args, fut = job
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(h.run_tool(tool, **args))
+                except Exception as e:
+                    fut.set_exception(e)
+
+    def utilisation(self):
+        """{arm: {"jobs", "busy_s", "utilisation"}} since the pool started."""
+        wall = max(time.time() - self._t0, 1e-9)
+        return {n: {"jobs": h.jobs, "busy_s": round(h.busy_s, 3), "utilisation": round(h.busy_s / wall, 3)}
+                for n, h in self.handles.items()}
+
+    def shutdown(self):
+        self._stop.set()
+        for w in self._workers:
+            w.join()
@@ -0,0 +1,93 @@
+# preflight.py
+
+import numpy as np
+from motionprogram import Move
+
+
+class PreflightError(ValueError):
+    def __init__(self, violations):
+        self.violations = violations
+        head = "; ".join(f"{v['step']}: {v['reason']}" for v in violations[:5])
+        more = f" (+{len(violations) - 5} more)" if len(violations) > 5 else ""
+        super().__init__(f"plan rejected before moving: {head}{more}")
+
+
+class Workspace:
+    """
+    Cell limits a plan is checked against in one NumPy pass before it runs:
+    an axis-aligned workspace box, keep-out boxes, and an approximation of
+    the joint limits as a reach shell around the shoulder, a column around
+    the base and a wrist pitch limit. Straight Cartesian segments are sampled
+    so a move between two valid poses cannot cut through a keep-out; joint
+    moves are checked at their endpoints only.
+
+        ws = Workspace(keepouts={"balance": ((300, -500, 0), (450, -350, 250))})
+        ws.check(uFactory_xArm.plan_pick_sample_from_bed(3))
+    """
+
+    def __init__(self, box=((-900, -900, 0), (900, 900, 700)), keepouts=None,
+                 shoulder=(0, 0, 267), reach=900.0, base_radius=150.0, pitch_limit=90.0, samples=8):
+        self.box = np.asarray(box, dtype=float)
+        self.keepouts = {n: np.asarray(b, dtype=float) for n, b in (keepouts or {}).items()}
+        self.shoulder = np.asarray(shoulder, dtype=float)
+        self.reach = reach
+        self.base_radius = base_radius
+        self.pitch_limit = pitch_limit
+        self.samples = samples
+
+    def fingerprint(self):
+        """Every limit the check reads, so a cache can tell when a compiled plan went stale."""
+        return repr((self.box.tolist(), sorted((n, b.tolist()) for n, b in self.keepouts.items()),
+                     self.shoulder.tolist(), self.reach, self.base_radius, self.pitch_limit, self.samples))
+
+    def points(self, prog, start=None):
+        """(points (N, 6), owning step index (N,)) for every pose the program visits."""
+        moves = [(k, s) for k, s in enumerate(prog) if isinstance(s, Move)]
+        if not moves:
+            return np.empty((0, 6)), np.empty(0, dtype=int)
+        poses = np.array([s.pose[:6] for _, s in moves], dtype=float)
+        owner = np.array([k for k, _ in moves])
+        prev = np.vstack([poses[:1] if start is None else np.asarray(start[:6], dtype=float)[None], poses[:-1]])
+        cart = np.array([not s.joint for _, s in moves])
+        # Interior samples along straight Cartesian segments; orientation is checked at the waypoints.
+        f = np.linspace(0, 1, self.samples + 2)[1:-1]
+        seg = prev[cart, None, :] + (poses[cart, None, :] - prev[cart, None, :]) * f[None, :, None]
+        return (np.vstack([poses, seg.reshape(-1, 6)]),
+                np.concatenate([owner, np.repeat(owner[cart], len(f))]))
+
+    def violations(self, prog, start=None):
+        pts, owner = self.points(prog, start)
+        xyz = pts[:, :3]
+        checks = {
+            "outside workspace box": np.any((xyz < self.box[0]) | (xyz > self.box[1]), axis=1),
+            "beyond reach": np.linalg.norm(xyz - self.shoulder, axis=1) > self.reach,
+            "inside base column": np.hypot(xyz[:, 0], xyz[:, 1]) < self.base_radius,
+            "wrist pitch limit": np.abs(pts[:, 4]) > self.pitch_limit,
+        }
+        for name, (lo, hi) in self.keepouts.items():
+            checks[f"in keep-out {name}"] = np.all((xyz > lo) & (xyz < hi), axis=1)
+        out, seen = [], set()
+        for reason, bad in checks.items():
+            for i in np.flatnonzero(bad):
+                k = int(owner[i])
+                if (k, reason) not in seen:
+                    seen.add((k, reason))
+                    out.append({"index": k, "step": prog[k].name or "pose", "reason": reason,
+                                "at": [round(float(v), 1) for v in xyz[i]]})
+        return sorted(out, key=lambda v: v["index"])
+
+    def check(self, prog, start=None):
+        """Raise PreflightError listing every violating step; returns prog unchanged otherwise."""
+        bad = self.violations(prog, start)
+        if bad:
+            raise PreflightError(bad)
+        return prog
+
+
+def check_tools(calls, workspace=None, poses=None):
+    """Validate a whole queue of tools.py calls given as (tool, args) before any of it runs."""
+    from motionmodel import tool_program
+    from robotmotion import uFactory_xArm
+    ws = workspace or uFactory_xArm.WORKSPACE
+    prog = [step for tool, args in calls for step in tool_program(tool, args, poses)]
+    return ws.check(prog)
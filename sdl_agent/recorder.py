@@ -0,0 +1,138 @@
+# recorder.py
+
+import struct, sys, time
+from array import array
+from gripper import GripperController
+
+MAGIC = b"XTRJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+FIELDS = 12                 # t, op, v0..v6, speed, radius, flags
+OP_POSE, OP_JOINT, OP_GRIP = 1, 2, 3
+F_WAIT, F_RELATIVE = 1, 2
+_POSE_KEYS = ("x", "y", "z", "roll", "pitch", "yaw")
+
+
+class Trajectory:
+    """
+    Timestamped command stream backed by a flat array('d'), FIELDS doubles per
+    command. Saved as a small header plus the raw little-endian array.
+    """
+
+    def __init__(self, data=None):
+        self.data = data if data is not None else array("d")
+
+    def __len__(self):
+        return len(self.data) // FIELDS
+
+    def __iter__(self):
+        d = self.data
+        for k in range(0, len(d), FIELDS):
+            yield d[k:k + FIELDS]
+
+    def append(self, t, op, values, speed, radius, flags):
+        vals = list(values)[:7]
+        self.data.extend([t, op] + vals + [0.0] * (7 - len(vals))
+                         + [speed or 0.0, -1.0 if radius is None else radius, flags])
+
+    @property
+    def duration(self):
+        return self.data[-FIELDS] - self.data[0] if len(self) else 0.0
+
+    def save(self, path):
+        data = self.data
+        if sys.byteorder != "little":
+            data = array("d", data); data.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self)))
+            data.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, n = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a v{VERSION} trajectory file")
+            data = array("d")
+            data.fromfile(f, n * FIELDS)
+        if sys.byteorder != "little":
+            data.byteswap()
+        return cls(data)
+
+
+class RecordingArm:
+    """Wraps an XArmAPI handle and appends every motion and gripper command to a Trajectory."""
+
+    def __init__(self, arm, trajectory=None):
+        self._arm = arm
+        self.trajectory = trajectory or Trajectory()
+        self._t0 = time.time()
+
+    def _rec(self, op, values, speed, radius, kwargs):
+        flags = F_WAIT * bool(kwargs.get("wait")) | F_RELATIVE * bool(kwargs.get("relative"))
+        self.trajectory.append(time.time() - self._t0, op, values, speed, radius, flags)
+
+    def set_position(self, *args, **kwargs):
+        ret = self._arm.set_position(*args, **kwargs)
+        vals = list(args[:6]) + [kwargs.get(k) for k in _POSE_KEYS[len(args[:6]):]]
+        self._rec(OP_POSE, [float("nan") if v is None else v for v in vals],
+                  kwargs.get("speed"), kwargs.get("radius"), kwargs)
+        return ret
+
+    def set_servo_angle(self, *args, **kwargs):
+        ret = self._arm.set_servo_angle(*args, **kwargs)
+        self._rec(OP_JOINT, kwargs.get("angle") or [], kwargs.get("speed"), kwargs.get("radius"), kwargs)
+        return ret
+
+    def set_gripper_position(self, pos, *args, **kwargs):
+        ret = self._arm.set_gripper_position(pos, *args, **kwargs)
+        self._rec(OP_GRIP, [pos], kwargs.get("speed"), None, kwargs)
+        return ret
+
+    def play(self, cmds):
+        code, sent = self._arm.play(cmds)
+        for name, kw in cmds[:sent]:
+            if name == "set_position":
+                self._rec(OP_POSE, [kw.get(k) for k in _POSE_KEYS], kw.get("speed"), kw.get("radius"), kw)
+            else:
+                self._rec(OP_JOINT, kw.get("angle") or [], kw.get("speed"), kw.get("radius"), kw)
+        return code, sent
+
+    def __getattr__(self, name):
+        return getattr(self._arm, name)
+
+
+def replay(trajectory, arm, rate=1.0, scale_speed=False):
+    """
+    Stream a Trajectory back to a controller or simulator. Commands keep their
+    recorded spacing divided by rate; scale_speed also multiplies motion
+    speeds by rate. Gripper commands wait for the jaws like _grip_move does.
+    Returns the wall seconds the replay took.
+    """
+    g = GripperController(arm)
+    t_start, t_first = time.time(), None
+    for rec in trajectory:
+        t, op = rec[0], int(rec[1])
+        t_first = t if t_first is None else t_first
+        delay = t_start + (t - t_first) / rate - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        speed = rec[9] * rate if scale_speed else rec[9]
+        radius = None if rec[10] < 0 else rec[10]
+        flags = int(rec[11])
+        wait, relative = bool(flags & F_WAIT), bool(flags & F_RELATIVE)
+        if op == OP_POSE:
+            kw = {k: v for k, v in zip(_POSE_KEYS, rec[2:8]) if v == v}
+            code = arm.set_position(**kw, speed=speed, radius=radius, relative=relative, wait=wait)
+        elif op == OP_JOINT:
+            code = arm.set_servo_angle(angle=list(rec[2:9]), speed=speed, radius=radius,
+                                       relative=relative, wait=wait)
+        elif op == OP_GRIP:
+            g.trigger(rec[2], int(rec[9]) or 2000)
+            g.wait()
+            code = 0
+        else:
+            raise ValueError(f"unknown trajectory op {op}")
+        if code not in (0, None):
+            raise RuntimeError(f"replay failed at t={t:.3f}s: {code}")
+    return time.time() - t_start
@@ -1,73 +1,493 @@
 #robotmotion.py
 
-from xarm.wrapper import XArmAPI
-import time
+try:
+    from xarm.wrapper import XArmAPI
+except ImportError:     # simulator-only installs
+    XArmAPI = None
+from simarm import SimXArmAPI, sim_ik
+from shadow import ShadowArm
+from session import RobotSession, NOT_CONNECTED
+from supervisor import SupervisedArm, initialise
+from gripper import GripperController, GraspError
+from ikcache import IKCache
+from telemetry import TelemetrySampler
+from zones import ZONES
+from recorder import RecordingArm
+from latency import LatencyArm
+from dryrun import DryRunArm
+from bed import Bed
+from preflight import Workspace
+from routes import RouteCache
+from cancel import CancelToken, Cancelled
+from motionprogram import Move, Grip, Sync, optimize, compile_blended, apply_load_profiles, unwind_program
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+import json, os, threading, time
+
+_KIN = SimXArmAPI()     # kinematic timing for profile gain estimates
+# Per-call state: every thread has its own, and asyncio.to_thread (AsyncArm) carries the caller's.
+_DRY = ContextVar("xarm_dry", default=None)          # ArmContext of the enclosing dry_run()
+_CELL = ContextVar("xarm_cell", default=None)        # ArmContext bound with using(), e.g. a pool.py ArmHandle
+_PENDING = ContextVar("xarm_pending", default=None)  # motion program buffered inside batch()
+_TOKEN = ContextVar("xarm_token", default=None)      # CancelToken of the innermost cancellable() block
+_TRAIL = ContextVar("xarm_trail", default=None)      # (load state before it, steps _exec completed inside it)
+
+
+class BatchAborted(RuntimeError):
+    """Queued motion of an earlier call in the same batch() failed, so this call's motion was not run."""
+
+
+class QueuedCall:
+    """A call whose motion waits in the batch() queue; done(err) finishes it once that has run (err None) or not."""
+
+    def __init__(self, label, done, token, trail):
+        self.label = label
+        self.done = done
+        self.token = token      # its cancellable() token, checked while its motion runs
+        self.trail = trail      # and its trail, so a cancel unwinds the whole call
+
+
+class ArmContext:
+    """
+    Per-connection state behind uFactory_xArm: the wrapped controller handle
+    and its RobotSession, gripper, telemetry, IK cache, load state and timing
+    marks. The static methods are thin wrappers acting on
+    uFactory_xArm.context(). Settings a context does not hold (poses,
+    profiles, WORKSPACE, ...) read through to uFactory_xArm, so it stands in
+    wherever pool.py's ArmHandle does.
+    """
+
+    def __init__(self, arm=None, ik_cache=None, dry=None):
+        self.arm = arm
+        self.session = None     # RobotSession owning the controller handle under the wrapper layers
+        self.gripper = None
+        self.telemetry = None
+        self.IK_CACHE = ik_cache
+        self.loaded = False     # gripper holds a sample
+        self.load_gain_s = 0.0  # estimated seconds saved by LOAD_PROFILES since reset_metrics()
+        self.parked = None      # Move the idle arm was parked at, see run()
+        self.t_settled = 0.0    # wall time the arm last came to rest after a command
+        self.segment = 0        # telemetry segment stamp of the step being executed
+        self.dry = dry          # DryRunArm costing this context's commands, see dry_run()
+        self.name = None        # cell name its zones are prefixed with, see pool.py
+
+    def slot(self, i):
+        # Bed slot of sample i; pool.py's ArmHandle maps pool-wide sample ids onto its bed.
+        return i
+
+    def __getattr__(self, name):
+        return getattr(uFactory_xArm, name)
+
 
 class uFactory_xArm:
     IP = "192.168.1.197"
-    arm = None
+    _live = None        # ArmContext of the connected controller
+    _calls = []         # CancelTokens of the running outermost cancellable() blocks and queued calls
+    _calls_lock = threading.Lock()
+    BLEND = True        # compile programs into blended streams, stopping only for grips
+    BLEND_RADIUS = 20
+    SEGMENT_PROFILES = {}   # (from, to) | to | "*" -> {"radius": mm, "speed": mm/s}
+    JOINT_TRANSFER = True   # long user-area transfers in joint space, Cartesian final approach
+    JOINT_SPEED = 60        # deg/s
+    # Speed factor and accelerations by gripper load; taught speeds are for loaded moves. Off until
+    # tuned on the cell, e.g. {"empty": {"speed": 1.5, "mvacc": 3000, "joint_mvacc": 800}, "loaded": {}}
+    LOAD_PROFILES = {}
+    VERIFY_GRASP = True     # check the jaw position after every grasp and abort on a miss
+    MOTION_MODEL = None     # MotionModel dry_run() costs with; fitted on the logs at first use
+    grasp_failures = Counter()  # missed grasps by the pose they happened at, e.g. "sample3"
+    IK_CACHE_PATH = Path(os.getenv("XARM_IK_CACHE", Path(__file__).with_name("ik_cache.json")))
+    ROUTES = RouteCache()       # compiled buffers for fixed routes, see run(route=...)
+    WORKSPACE = Workspace()     # pre-flight limits every compiled program is checked against
+    HEARTBEAT_S = 1.0   # link check period of the SupervisedArm connect() installs
+    SESSION = os.getenv("XARM_SESSION", "1") not in ("", "0")  # serialize controller access, see session.py
+    LATENCY = os.getenv("XARM_LATENCY", "0") not in ("", "0")   # time every controller call, see start_latency()
+    PARKING = None      # ParkingPolicy moving the idle arm towards the likely next call
+    SIM = os.getenv("XARM_SIM", "0") not in ("", "0")
+    SIM_TIME_SCALE = float(os.getenv("XARM_SIM_TIME_SCALE", "0")) or None
 
     #-----POSITIONS-----
     home = [310, -2.5, 7.5, -180, -15, 0, 300]
     offsethome = [423, -2.5, 185, -180, 0, 0, 300]
-    sample1above = [608.5, -67, 185, -180, 0, 0, 300]
-    sample1 = [608.5, -67, 80, 180, 0, 0, 200]
-    sample2above = [608.5, -35, 185, -180, 0, 0, 300]
-    sample2 = [608.5, -35, 80, 180, 0, 0, 200]
-    sample3above = [608.5, -4, 185, -180, 0, 0, 300]
-    sample3 = [608.5, -4, 80, 180, 0, 0, 200]
-    sample4above = [608.5, 27, 185, -180, 0, 0, 300]
-    sample4 = [608.5, 27, 80, 180, 0, 0, 200]
-    sample5above = [608.5, 58, 185, -180, 0, 0, 300]
-    sample5 = [608.5, 58, 80, 180, 0, 0, 200]
+    # Taught five-slot bed; swap in Bed.grid(...) for larger trays.
+    BED = Bed.from_poses([
+        ([608.5, -67, 185, -180, 0, 0, 300], [608.5, -67, 80, 180, 0, 0, 200]),
+        ([608.5, -35, 185, -180, 0, 0, 300], [608.5, -35, 80, 180, 0, 0, 200]),
+        ([608.5, -4, 185, -180, 0, 0, 300], [608.5, -4, 80, 180, 0, 0, 200]),
+        ([608.5, 27, 185, -180, 0, 0, 300], [608.5, 27, 80, 180, 0, 0, 200]),
+        ([608.5, 58, 185, -180, 0, 0, 300], [608.5, 58, 80, 180, 0, 0, 200]),
+    ])
     userarea = [-792, -229, 162, 90, 0, -90, 300]
     measurementstation = [540, -397, 59, -90, 0, -90, 200]
+    measurementstation_retreat = [500, -397, 59, -90, 0, -90, 300]
+    userroute_a_out = [263, -270, 185, 180, 0, 0, 300]
+    userroute_a_in = [263, 0, 185, 180, 0, 0, 300]
+    userroute_b = [45, -270, 215, 180, 0, -120, 300]
+    userroute_c = [-250, -85, 300, 180, 0, -160, 300]
+    userroute_d = [-742, -229, 162, 90, 0, -90, 300]
 
     #-------------------
 
     @staticmethod
-    def connect():
-        a = XArmAPI(uFactory_xArm.IP, is_radian=False)
-        a.clean_warn(); a.clean_error()
-        a.motion_enable(True); a.set_mode(0); a.set_state(0)
-        uFactory_xArm.arm = a
-        return a
-    
+    def connect(sim=None, time_scale=None, shadow=True, supervise=True):
+        if sim is None:
+            sim = uFactory_xArm.SIM
+        if sim:
+            ts = time_scale if time_scale is not None else uFactory_xArm.SIM_TIME_SCALE
+            a = SimXArmAPI(uFactory_xArm.IP, is_radian=False, time_scale=ts, samples=uFactory_xArm.BED.poses[:, 1, :3])
+        elif XArmAPI is None:
+            raise RuntimeError("xArm SDK not installed; use connect(sim=True).")
+        else:
+            a = XArmAPI(uFactory_xArm.IP, is_radian=False)
+        if uFactory_xArm.SESSION:
+            a = RobotSession(a)
+        if shadow:
+            a = ShadowArm(a)
+        c = uFactory_xArm._live
+        uFactory_xArm._release(c)
+        c.session = uFactory_xArm._layer(RobotSession, a)
+        c.IK_CACHE = uFactory_xArm.ik_cache("sim" if sim else None)
+        initialise(a)
+        if supervise:
+            a = SupervisedArm(a, uFactory_xArm.HEARTBEAT_S).start()
+        c.arm = a
+        if uFactory_xArm.LATENCY:
+            uFactory_xArm.start_latency()
+        return c.arm
+
+    @staticmethod
+    def _release(c):
+        # Stop the threads a connection started: telemetry, heartbeat and the session's command thread.
+        if c.telemetry is not None:
+            c.telemetry.stop()
+            c.telemetry = None
+        sup = uFactory_xArm._layer(SupervisedArm, c.arm)
+        if sup is not None:
+            sup.stop()
+        if c.session is not None:
+            c.session.close()
+            c.session = None
+
+    @staticmethod
+    def disconnect():
+        c = uFactory_xArm._live
+        if c.arm is not None:
+            c.arm.disconnect()
+        uFactory_xArm._release(c)
+        c.arm = c.gripper = None
+
+    @staticmethod
+    def context():
+        """
+        ArmContext the static methods act on: this call's dry run, else the
+        context bound with using(), else the connected controller.
+        """
+        c = _DRY.get()
+        if c is None:
+            c = _CELL.get()
+        return c if c is not None else uFactory_xArm._live
+
+    @staticmethod
+    @contextmanager
+    def using(c):
+        """
+        Make the static API, and so the tools.py calls, act on ArmContext c,
+        e.g. a pool.py ArmHandle, for this thread (or task) only.
+        """
+        token = _CELL.set(c)
+        try:
+            yield c
+        finally:
+            _CELL.reset(token)
+
+    @staticmethod
+    def dry_arm():
+        # The DryRunArm commands are costed on inside dry_run(), else None.
+        return uFactory_xArm.context().dry
+
+    @staticmethod
+    def reserve(*zones):
+        # ZONES.reserve(), except inside a dry run, which never touches the cell. A named
+        # context's zones are its own, e.g. "arm0/measurementstation".
+        c = uFactory_xArm.context()
+        if c.dry is not None:
+            return nullcontext()
+        return ZONES.reserve(*(f"{c.name}/{z}" for z in zones) if c.name else zones)
+
+    @staticmethod
+    def ik_cache(kind=None):
+        # The arm's own file, or a separate one per kind ("sim", "tuner", ...) so their solutions never mix.
+        p = uFactory_xArm.IK_CACHE_PATH
+        return IKCache(p if kind is None else p.with_name(f"{p.stem}_{kind}{p.suffix}"))
+
+    @staticmethod
+    def status():
+        # For UI polls: answered from reported state, never queued behind a running command.
+        s = uFactory_xArm._layer(RobotSession)
+        if s is not None:
+            return s.status()
+        arm = uFactory_xArm._ensure()
+        (_, state), (_, ew), (_, pose) = arm.get_state(), arm.get_err_warn_code(), arm.get_position(is_radian=False)
+        return {"connected": getattr(arm, "connected", True), "state": state, "mode": getattr(arm, "mode", None),
+                "error": (ew or [None, None])[0], "warn": (ew or [None, None])[1], "pose": list(pose or [])[:6]}
+
+    @staticmethod
+    def start_telemetry(rate_hz=50.0, size=4096):
+        uFactory_xArm.stop_telemetry()
+        c = uFactory_xArm.context()
+        c.telemetry = TelemetrySampler(uFactory_xArm._ensure(), rate_hz, size).start()
+        return c.telemetry
+
+    @staticmethod
+    def stop_telemetry():
+        c = uFactory_xArm.context()
+        if c.telemetry is not None:
+            c.telemetry.stop()
+            c.telemetry = None
+
+    @staticmethod
+    def reset_metrics():
+        uFactory_xArm._gripper().reset_stats()
+        uFactory_xArm.context().load_gain_s = 0.0
+
+    @staticmethod
+    def metrics():
+        m = dict(uFactory_xArm._gripper().stats, load_profile_gain_s=uFactory_xArm.context().load_gain_s)
+        return {k: round(v, 3) for k, v in m.items()}
+
+    @staticmethod
+    def _layer(cls, arm=None):
+        # Find a wrapper layer (ShadowArm, RecordingArm, ...) around the handle.
+        arm = arm or uFactory_xArm.context().arm
+        while arm is not None and not isinstance(arm, cls):
+            arm = getattr(arm, "_arm", None)
+        return arm
+
+    @staticmethod
+    def start_recording():
+        arm, c = uFactory_xArm._ensure(), uFactory_xArm.context()
+        if not isinstance(arm, RecordingArm):
+            c.arm = RecordingArm(arm)
+        return c.arm.trajectory
+
+    @staticmethod
+    def stop_recording(path=None):
+        uFactory_xArm.flush()
+        arm = uFactory_xArm._ensure()
+        if not isinstance(arm, RecordingArm):
+            raise RuntimeError("Not recording.")
+        uFactory_xArm.context().arm = arm._arm
+        if path is not None:
+            arm.trajectory.save(path)
+        return arm.trajectory
+
+    @staticmethod
+    def start_latency():
+        # Outermost layer, so the histograms include the time spent in the other wrappers.
+        arm, c = uFactory_xArm._ensure(), uFactory_xArm.context()
+        if uFactory_xArm._layer(LatencyArm) is None:
+            c.arm = LatencyArm(arm)
+        return c.arm
+
+    @staticmethod
+    def latency_report(path=None, reset=False):
+        # {} unless start_latency() or LATENCY is on; path also writes the histograms.
+        arm = uFactory_xArm._layer(LatencyArm)
+        if arm is None:
+            return {}
+        rep = arm.dump(path)["commands"] if path is not None else arm.report()
+        if reset:
+            arm.reset()
+        return rep
+
+    @staticmethod
+    def motion_model():
+        # MOTION_MODEL, fitted once on the store's logs; set it to None to refit on newer logs.
+        if uFactory_xArm.MOTION_MODEL is None:
+            from motionmodel import MotionModel     # motionmodel imports this module
+            uFactory_xArm.MOTION_MODEL = MotionModel.from_logs()
+        return uFactory_xArm.MOTION_MODEL
+
+    @staticmethod
+    @contextmanager
+    def dry_run(model=None):
+        """
+        Cost everything issued inside the block without moving the robot:
+
+            with uFactory_xArm.dry_run() as cost:
+                ocp_measurement(1); cv_measurement(1)
+            cost.table()
+
+        Commands go through the usual plans, optimizer and _exec, but land on a
+        DryRunArm starting from the arm's current pose. The dry state belongs to
+        this thread (or task) only, so real calls elsewhere keep the arm, and
+        zones are not reserved. model defaults to motion_model().
+        """
+        U, live = uFactory_xArm, uFactory_xArm._live
+        if _DRY.get() is not None:
+            raise RuntimeError("Already in a dry run.")
+        model = model or U.motion_model()
+        start = None
+        if live.arm is not None:
+            code, pose = live.arm.get_position(is_radian=False)
+            start = pose[:6] if code in (0, None) else None
+        dry = DryRunArm(model.params, start)
+        dry.motion_enable(True); dry.set_mode(0); dry.set_state(0)
+        # Dry-run IK is the simulator's, so it uses the simulator's cache file.
+        c = ArmContext(dry, U.ik_cache("sim"), dry)
+        c.loaded, c.parked = live.loaded, live.parked
+        ctx, pending = _DRY.set(c), _PENDING.set([] if _PENDING.get() is not None else None)
+        try:
+            yield dry
+            U.flush()
+        finally:
+            _PENDING.reset(pending)
+            _DRY.reset(ctx)
+            if dry.pending():
+                dry.end_step("(unassigned)")
+
+    @staticmethod
+    @contextmanager
+    def cancellable(token=None, label=None):
+        """
+        Make the motion issued inside the block stoppable with token.cancel()
+        or cancel(reason, label) (default token: the enclosing block's, else a
+        new one named label). The token belongs to the calling thread or task,
+        so calls running side by side are cancelled separately. _exec checks it
+        between waypoints and gripper actions; once it trips, the unsent rest
+        is dropped and the steps already done are unwound with unwind_program(),
+        so a held sample goes back where it was picked up. Cancelled is then
+        re-raised for the caller, e.g. a tools.py call, to report.
+        """
+        U = uFactory_xArm
+        outer, outer_trail = _TOKEN.get(), _TRAIL.get()
+        token = token or outer or CancelToken(label)
+        loaded, trail = U.context().loaded, []
+        token_reset, trail_reset = _TOKEN.set(token), _TRAIL.set((loaded, trail))
+        top = outer is None and _DRY.get() is None
+        if top:
+            with U._calls_lock:
+                U._calls.append(token)
+        try:
+            yield token
+        except BaseException as e:
+            U._discard()    # motion this block queued never runs; calls queued before it still do
+            if not isinstance(e, Cancelled):
+                raise
+            _TOKEN.set(None); _TRAIL.set(None)
+            prog = unwind_program(trail, loaded)
+            if prog:
+                print(f"Cancelled ({token.reason}); unwinding {len(prog)} steps...")
+                U._exec(U.compile(prog))
+            raise
+        else:
+            if outer_trail is not None:
+                outer_trail[1].extend(trail)
+        finally:
+            _TRAIL.reset(trail_reset); _TOKEN.reset(token_reset)
+            if top:
+                with U._calls_lock:
+                    U._calls.remove(token)
+
+    @staticmethod
+    def cancel(reason="cancelled", call=None):
+        # Trip a running call from another thread: call is its CancelToken or label, or
+        # None to stop the only one running. False when nothing (unambiguous) was running.
+        with uFactory_xArm._calls_lock:
+            running = list(uFactory_xArm._calls)
+        if call is not None:
+            running = [t for t in running if t is call or t.label == call]
+        elif len(running) > 1:
+            return False
+        for t in running:
+            t.cancel(reason)
+        return bool(running)
+
+    @staticmethod
+    def running_calls():
+        # Labels of the cancellable() calls in progress, for picking one to cancel().
+        with uFactory_xArm._calls_lock:
+            return [t.label for t in uFactory_xArm._calls]
+
+    @staticmethod
+    def connection_stats(reset=False):
+        sup = uFactory_xArm._layer(SupervisedArm)
+        if sup is None:
+            return {}
+        s = sup.stats()
+        if reset:
+            sup.reset_stats()
+        return s
+
+    @staticmethod
+    def command_stats(reset=False):
+        uFactory_xArm._ensure()
+        arm = uFactory_xArm._layer(ShadowArm)
+        if arm is None:
+            return {}
+        s = arm.stats()
+        if reset:
+            arm.reset_stats()
+        return s
+
     @staticmethod
     def _ensure():
-        if uFactory_xArm.arm is None:
-            raise RuntimeError("Call connect() first.")
-        return uFactory_xArm.arm
+        c = uFactory_xArm.context()
+        if c.arm is None:
+            uFactory_xArm.connect()
+        return c.arm
         
     @staticmethod
     def move_to(pos, speed_override=None):
+        uFactory_xArm.flush()
+        uFactory_xArm._unpark([])
+        token = _TOKEN.get()
+        if token is not None:
+            token.check()
         arm = uFactory_xArm._ensure()
         x,y,z,r,p,yaw,spd = pos
         s = speed_override if speed_override is not None else spd
-        code = arm.set_position(x=x, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=s, wait=True)
+        uFactory_xArm.WORKSPACE.check([Move(None, (x,y,z,r,p,yaw), s)])
+        with uFactory_xArm.reserve("arm"):
+            code = arm.set_position(x=x, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=s, wait=True)
+        uFactory_xArm.context().t_settled = time.time()
         if code not in (0, None):
             raise RuntimeError(f"set_position failed: {code}")
         
+    @staticmethod
+    def _gripper():
+        arm, c = uFactory_xArm._ensure(), uFactory_xArm.context()
+        if c.gripper is None or c.gripper.arm is not arm:
+            c.gripper = GripperController(arm)
+        return c.gripper
+
     @staticmethod
     def _grip_move(pos, speed=2000, timeout=2.0):
-        arm = uFactory_xArm._ensure()
-        arm.set_gripper_enable(True); arm.set_gripper_mode(0); arm.set_gripper_speed(speed)
-        arm.set_gripper_position(pos, speed=speed, wait=False)
-        t0 = time.time()
-        while time.time() - t0 < timeout:
-            code, cur = arm.get_gripper_position()
-            if code in (0, None) and abs((cur or 0) - pos) < 10:
-                break
-            time.sleep(0.02)
+        g = uFactory_xArm._gripper()
+        with uFactory_xArm.reserve("arm"):
+            g.trigger(pos, speed, timeout=timeout)
+            g.wait()
 
     @staticmethod
-    def gripper_open(pos=130, speed=2000): uFactory_xArm._grip_move(pos, speed)
+    def gripper_open(pos=130, speed=2000):
+        uFactory_xArm.flush(); uFactory_xArm._grip_move(pos, speed); uFactory_xArm.context().loaded = False
+
     @staticmethod
-    def gripper_close(pos=0,   speed=2000): uFactory_xArm._grip_move(pos, speed)
+    def gripper_close(pos=0,   speed=2000):
+        # Cannot tell an empty close from a grasp here, so assume the slower loaded profile.
+        uFactory_xArm.flush(); uFactory_xArm._grip_move(pos, speed); uFactory_xArm.context().loaded = True
 
     @staticmethod
     def get_pose():
-        arm = uFactory_xArm._ensure()
+        uFactory_xArm.flush()
+        arm, c = uFactory_xArm._ensure(), uFactory_xArm.context()
+        tm = c.telemetry
+        last = tm.latest() if tm is not None and tm.running else None
+        if last is not None and last["t"] > c.t_settled:
+            return [float(v) for v in last["pose"]]
         code, pose = arm.get_position(is_radian=False)
         if code not in (0, None):
             raise RuntimeError(f"get_position error: {code}")
@@ -76,123 +496,486 @@ class uFactory_xArm:
     @staticmethod
     def move_forward(dx=50, speed=100):
         x,y,z,r,p,yaw = uFactory_xArm.get_pose()[:6]
-        uFactory_xArm.arm.set_position(x=x+dx, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=speed, wait=True)
+        uFactory_xArm._unpark([])
+        uFactory_xArm.WORKSPACE.check([Move(None, (x+dx,y,z,r,p,yaw), speed)], start=(x,y,z,r,p,yaw))
+        with uFactory_xArm.reserve("arm"):
+            uFactory_xArm._ensure().set_position(x=x+dx, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=speed, wait=True)
+        uFactory_xArm.context().t_settled = time.time()
 
     @staticmethod
     def move_backward(dx=50, speed=100):
         x,y,z,r,p,yaw = uFactory_xArm.get_pose()[:6]
-        uFactory_xArm.arm.set_position(x=x-dx, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=speed, wait=True)
+        uFactory_xArm._unpark([])
+        uFactory_xArm.WORKSPACE.check([Move(None, (x-dx,y,z,r,p,yaw), speed)], start=(x,y,z,r,p,yaw))
+        with uFactory_xArm.reserve("arm"):
+            uFactory_xArm._ensure().set_position(x=x-dx, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=speed, wait=True)
+        uFactory_xArm.context().t_settled = time.time()
 
     @staticmethod    
     def connect_to_robot():
-        if uFactory_xArm.arm is None:
-            uFactory_xArm.connect()
-        return uFactory_xArm.arm
+        return uFactory_xArm._ensure()
+
+    # MOTION PROGRAMS
+
+    @staticmethod
+    def pose_table(poses=None):
+        # Named poses are the [x, y, z, roll, pitch, yaw, speed] lists above, plus the
+        # bed's slots under their old sample{i} / sample{i}above names.
+        src = poses or uFactory_xArm
+        names = [n for n, v in vars(uFactory_xArm).items()
+                 if isinstance(v, list) and len(v) == 7 and not n.startswith("_")]
+        return {**{n: list(getattr(src, n)) for n in names}, **src.BED.named()}
+
+    @staticmethod
+    def load_tuned(path, poses=None):
+        """Apply a tuner.py pose-table file: named pose speeds and per-segment SEGMENT_PROFILES."""
+        P = poses or uFactory_xArm
+        with open(path, encoding="utf-8") as f:
+            tuned = json.load(f)
+        for name, pose in tuned.get("poses", {}).items():
+            if P.BED.set_named(name, pose):
+                continue
+            if not isinstance(getattr(P, name, None), list):
+                raise ValueError(f"{path}: unknown pose {name}")
+            setattr(P, name, list(pose))
+        for key, prof in tuned.get("segments", {}).items():
+            src, dst = key.split(">")
+            uFactory_xArm.SEGMENT_PROFILES[(src, dst)] = dict(prof)
+        return tuned
+
+    @staticmethod
+    def _mv(name, radius=None, wait=True, poses=None):
+        *pose, spd = getattr(poses or uFactory_xArm.context(), name)
+        return Move(name, tuple(pose), spd, radius, wait)
+
+    @staticmethod
+    def _via(name, wait=False, poses=None):
+        return uFactory_xArm._mv(name, radius=20, wait=wait, poses=poses)   # 20 mm blend
+
+    @staticmethod
+    def _transfer(name, wait=False, poses=None):
+        P = poses or uFactory_xArm.context()
+        if not P.JOINT_TRANSFER:
+            return uFactory_xArm._via(name, wait, poses)
+        *pose, _ = getattr(P, name)
+        return Move(name, tuple(pose), P.JOINT_SPEED, 20, wait, joint=True)
+
+    @staticmethod
+    def _command(arm, ik, step):
+        # (SDK call, kwargs) that drives the arm to step.
+        if step.joint:
+            angles = ik.joints(arm, step.name, step.pose)
+            return "set_servo_angle", dict(angle=angles, speed=step.speed, mvacc=step.mvacc,
+                                           radius=step.radius, wait=step.wait)
+        x,y,z,r,p,yaw = step.pose
+        return "set_position", dict(x=x, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=step.speed,
+                                    mvacc=step.mvacc, radius=step.radius, wait=step.wait)
+
+    @staticmethod
+    def _send(arm, ik, step):
+        cmd, kw = uFactory_xArm._command(arm, ik, step)
+        code = getattr(arm, cmd)(**kw)
+        if code not in (0, None):
+            raise RuntimeError(f"{cmd} failed: {code}")
+
+    @staticmethod
+    def _runs(prog):
+        # {start: end} of each run of two or more moves a route can hand over in one
+        # session queue item: up to a stop, and short of a move an overlapped grip rides on.
+        runs, k = {}, 0
+        while k < len(prog):
+            j = k
+            while (j < len(prog) and isinstance(prog[j], Move)
+                   and not (j + 1 < len(prog) and isinstance(prog[j + 1], Grip) and prog[j + 1].overlap)):
+                j += 1
+                if prog[j - 1].wait:
+                    break
+            if j - k > 1:
+                runs[k] = j
+            k = max(j, k + 1)
+        return runs
+
+    @staticmethod
+    def _play(arm, ik, run):
+        cmds = [uFactory_xArm._command(arm, ik, s) for s in run]
+        code, sent = arm.play(cmds)
+        if code == NOT_CONNECTED:
+            # Resend what did not get through one at a time, so the supervisor holds it for the
+            # link; a run that went through whole re-sends its last move to finish the wait.
+            for step in run[min(sent, len(run) - 1):]:
+                uFactory_xArm._send(arm, ik, step)
+        elif code not in (0, None):
+            raise RuntimeError(f"{cmds[min(sent, len(cmds) - 1)][0]} failed: {code}")
+
+    @staticmethod
+    def _exec(prog, play=False):
+        # play sends each blended run of a compiled route as one session queue item, see _runs().
+        P = uFactory_xArm.context()
+        arm, g = uFactory_xArm._ensure(), uFactory_xArm._gripper()
+        ik, tm = P.IK_CACHE, P.telemetry
+        zone = uFactory_xArm.reserve("arm")
+        sup = uFactory_xArm._layer(SupervisedArm, arm)
+        restarts = sup.restarts if sup else 0
+        token, trail = _TOKEN.get(), (_TRAIL.get() or (None, None))[1]
+        verify = P.VERIFY_GRASP and P.dry is None
+        back = here = None      # the last two waypoints reached
+        runs = uFactory_xArm._runs(prog) if play and uFactory_xArm._layer(RobotSession, arm) else {}
+        end = 0
+        with zone:
+            for k, step in enumerate(prog):
+                if k < end:
+                    continue
+                if sup and sup.restarts != restarts:
+                    raise RuntimeError("controller restarted mid-program; queued motion may be lost")
+                # An overlapped grip has already started with the move before it.
+                if token is not None and not (isinstance(step, Grip) and step.overlap):
+                    token.check()
+                P.segment += 1
+                if tm is not None:
+                    tm.segment = P.segment
+                if isinstance(step, Sync):
+                    continue
+                if isinstance(step, Grip):
+                    if not step.overlap:
+                        g.trigger(step.pos, step.speed)
+                        g.wait()
+                    P.loaded = step.load_after(P.loaded)
+                    if trail is not None:
+                        trail.append(step)
+                    if step.grasp and verify:
+                        uFactory_xArm._verify_grasp(step, P, arm, g, ik, back, here)
+                    continue
+                if k in runs:
+                    # One segment stamp and one token check for the whole run.
+                    end = runs[k]
+                    run = prog[k:end]
+                    uFactory_xArm._play(arm, ik, run)
+                    if run[-1].wait:
+                        P.t_settled = time.time()
+                    back, here = run[-2], run[-1]
+                    if trail is not None:
+                        trail.extend(run)
+                    continue
+                nxt = prog[k + 1] if k + 1 < len(prog) else None
+                overlap = isinstance(nxt, Grip) and nxt.overlap
+                if overlap:
+                    g.trigger(nxt.pos, nxt.speed, target=step.pose, at=nxt.at)
+                uFactory_xArm._send(arm, ik, step)
+                if overlap:
+                    g.wait()
+                if step.wait:
+                    P.t_settled = time.time()
+                back, here = here, step
+                if trail is not None:
+                    trail.append(step)
+
+    @staticmethod
+    def _verify_grasp(step, P, arm, g, ik, back, here):
+        # Jaws that closed all the way hold nothing: back out of the pick pose and abort.
+        held, pos = g.holding(step.pos)
+        if held:
+            return
+        P.loaded = False
+        loc = here.name if here is not None else None
+        P.grasp_failures[loc] += 1
+        if back is not None:
+            uFactory_xArm._send(arm, ik, replace(back, radius=None, wait=True, mvacc=None))
+        raise GraspError({"type": "grasp_failed", "location": loc, "gripper_pos": pos,
+                          "target": step.pos, "failures_here": P.grasp_failures[loc]})
+
+    @staticmethod
+    def grasp_stats(reset=False):
+        s = dict(uFactory_xArm.grasp_failures)
+        if reset:
+            uFactory_xArm.grasp_failures.clear()
+        return s
+
+    @staticmethod
+    def _move_time(p0, step):
+        if step.joint:
+            return _KIN.joint_move_duration(sim_ik(p0), sim_ik(step.pose), step.speed, step.mvacc)
+        return _KIN.move_duration(p0, step.pose, step.speed, step.mvacc)
+
+    @staticmethod
+    def _profile_gain(before, after):
+        # Rest-to-rest kinematic time saved per rescaled move; the first move's start is unknown.
+        gain, p0 = 0.0, None
+        for a, b in zip(before, after):
+            if isinstance(a, Move):
+                if p0 is not None and a != b:
+                    gain += uFactory_xArm._move_time(p0, a) - uFactory_xArm._move_time(p0, b)
+                p0 = a.pose
+        return gain
+
+    @staticmethod
+    def compile(prog, h=None):
+        # h stands in for the context, e.g. motionmodel's scratch one with its own load state.
+        P = h or uFactory_xArm.context()
+        prog = P.WORKSPACE.check(optimize(prog))
+        if uFactory_xArm.BLEND:
+            prog = compile_blended(prog, uFactory_xArm.SEGMENT_PROFILES, uFactory_xArm.BLEND_RADIUS)
+        if P.LOAD_PROFILES:
+            profiled, _ = apply_load_profiles(prog, P.LOAD_PROFILES, P.loaded)
+            P.load_gain_s += uFactory_xArm._profile_gain(prog, profiled)
+            prog = profiled
+        return prog
+
+    @staticmethod
+    def run(prog, route=None):
+        # route names a fixed program whose compiled buffer is cached in ROUTES.
+        U, pending = uFactory_xArm, _PENDING.get()
+        if pending is not None:
+            pending.extend(prog)
+        elif route is not None:
+            # A parked start is part of the program, cached per parking pose like any other variant.
+            start = U._unpark([])
+            name = f"{route}@{start[0].name}" if start else route
+            U._exec(U.ROUTES.get(name, start + list(prog), U.context(), U, U.compile), play=True)
+        else:
+            U._exec(U.compile(U._unpark(prog)))
+
+    @staticmethod
+    def _unpark(prog):
+        # Start from the parked pose so optimize() drops the offsethome detour a good guess saved.
+        U, c = uFactory_xArm, uFactory_xArm.context()
+        if U.PARKING is None or c is not U._live:
+            parked, c.parked = c.parked, None
+        else:
+            U.PARKING.cancel()
+            with U.reserve("arm"):      # let a park already under way finish and record its pose
+                parked, c.parked = c.parked, None
+        return [parked] + list(prog) if parked is not None else prog
+
+    @staticmethod
+    def tool_finished(tool, args):
+        # tools.py reports each finished call; the arm parks after PARKING.idle_s without a new one.
+        pol = uFactory_xArm.PARKING
+        if pol is not None and uFactory_xArm.context() is uFactory_xArm._live:
+            pol.observe(tool, args.get("i"))
+            pol.arm(uFactory_xArm.park)
+
+    @staticmethod
+    def park(seq=None):
+        # Runs on the policy's timer thread, under the arm zone so _unpark() can wait it out.
+        # Skipped while holding a sample, when not connected, or once seq is stale.
+        U, c = uFactory_xArm, uFactory_xArm._live
+        pol = U.PARKING
+        if pol is None or c.arm is None:
+            return None
+        try:
+            with U.reserve("arm"):
+                if c.loaded or (seq is not None and not pol.current(seq)):
+                    return None
+                here = Move(None, tuple(U.get_pose()[:6]), 0)
+                target = pol.target(here, U, lambda a, b: U._move_time(a.pose, b))
+                if target is None:
+                    return None
+                U._exec(U.compile([U._mv("offsethome"), target]))
+                c.parked = target
+        except Exception as e:
+            print(f"Parking skipped: {e}")
+            return None
+        pol.parks += 1
+        return target
+
+    @staticmethod
+    def defer(label, done):
+        """
+        Inside batch(), leave the rest of a call to the queue: the motion it has
+        queued is tagged with it, and done(err) runs once that motion has been
+        executed (err None), or has failed or been dropped. Until then it stays
+        cancellable by label. Returns False outside a batch, where nothing is
+        queued and the caller finishes itself.
+        """
+        U, pending = uFactory_xArm, _PENDING.get()
+        if pending is None:
+            return False
+        call = QueuedCall(label, done, _TOKEN.get(), _TRAIL.get())
+        mine = [k for k, s in enumerate(pending) if not isinstance(s, Sync) and s.call is None]
+        if not mine:
+            done(None)
+            return True
+        for k in mine:
+            pending[k] = replace(pending[k], call=call)
+        if call.token is not None and _DRY.get() is None:
+            with U._calls_lock:
+                U._calls.append(call.token)
+        return True
+
+    @staticmethod
+    def _discard():
+        # Drop the queued motion no call has claimed yet.
+        pending = _PENDING.get()
+        if pending:
+            pending[:] = [s for s in pending if getattr(s, "call", None) is not None]
+
+    @staticmethod
+    def _finish(call, err=None):
+        with uFactory_xArm._calls_lock:
+            if call.token in uFactory_xArm._calls:
+                uFactory_xArm._calls.remove(call.token)
+        call.done(err)
+
+    @staticmethod
+    def flush():
+        """
+        Run the queued motion as one compiled program. Queued calls (defer())
+        are finished as soon as their last step has run. A failing step fails
+        its call and drops the calls queued after it; BatchAborted is raised
+        only when unclaimed motion, e.g. the caller's own, was dropped too.
+        """
+        # Unparks here rather than in run(), as the arm may park while a batch is buffering.
+        U, pending = uFactory_xArm, _PENDING.get()
+        if not pending:
+            return
+        calls = list(dict.fromkeys(s.call for s in pending if getattr(s, "call", None) is not None))
+        prog = U.compile(U._unpark(pending[:]))
+        pending.clear()
+        last = {s.call: k for k, s in enumerate(prog) if getattr(s, "call", None) is not None}
+        k = 0
+        while k < len(prog):
+            call = getattr(prog[k], "call", None)
+            end = k
+            while end + 1 < len(prog) and getattr(prog[end + 1], "call", None) is call:
+                end += 1
+            reset = (_TOKEN.set(call.token), _TRAIL.set(call.trail)) if call is not None else None
+            try:
+                U._exec(prog[k:end + 1])
+            except Exception as e:
+                if isinstance(e, Cancelled) and call is not None and call.trail is not None:
+                    _TOKEN.set(None); _TRAIL.set(None)
+                    back = unwind_program(call.trail[1], call.trail[0])
+                    print(f"Cancelled ({e}); unwinding {len(back)} steps of {call.label}...")
+                    U._exec(U.compile(back))
+                first = f"{call.label} failed first" if call is not None else "earlier motion failed"
+                for c in calls:
+                    U._finish(c, e if c is call else BatchAborted(f"not run: {first}"))
+                if call is None or any(getattr(s, "call", None) is None for s in prog[end + 1:]):
+                    raise e if call is None else BatchAborted(f"{call.label} failed: {e}") from e
+                return
+            finally:
+                if reset is not None:
+                    _TRAIL.reset(reset[1]); _TOKEN.reset(reset[0])
+            while calls and last.get(calls[0], -1) <= end:
+                U._finish(calls.pop(0))
+            k = end + 1
+        for c in calls:
+            U._finish(c)
+
+    @staticmethod
+    @contextmanager
+    def batch():
+        # Buffer mid-level programs so the peephole pass can work across their
+        # boundaries. flush() before anything that needs the arm to be done.
+        # tools.py calls leave their trailing motion queued with defer(), so it
+        # is merged with the next call's and each call still gets its own result.
+        outer = _PENDING.get() is not None
+        if not outer:
+            token = _PENDING.set([])
+        try:
+            yield
+        finally:
+            if not outer:
+                try:
+                    uFactory_xArm.flush()
+                finally:
+                    _PENDING.reset(token)
+
+    @staticmethod
+    def _slot(i, poses=None):
+        # Approach and slot Moves for bed slot i, keeping the old sample{i} names.
+        P = poses or uFactory_xArm.context()
+        k = P.slot(i)
+        (*above, s_above), (*pose, s_pose) = P.BED.slot(k)
+        return Move(f"sample{k}above", tuple(above), s_above), Move(f"sample{k}", tuple(pose), s_pose)
+
+    @staticmethod
+    def plan_go_home(poses=None):
+        return [uFactory_xArm._mv("home", poses=poses)]
+
+    @staticmethod
+    def plan_pick_sample_from_bed(i:int, poses=None):
+        above, pose = uFactory_xArm._slot(i, poses)
+        mv = partial(uFactory_xArm._mv, poses=poses)
+        return [mv("offsethome"), above, Grip(130, overlap=True), pose,
+                Grip(0, grasp=True), above]
+
+    @staticmethod
+    def plan_place_sample_to_bed(i:int, poses=None):
+        above, pose = uFactory_xArm._slot(i, poses)
+        mv = partial(uFactory_xArm._mv, poses=poses)
+        return [above, pose, Grip(130), above, mv("offsethome"), Grip(0)]
+
+    @staticmethod
+    def plan_place_sample_to_userarea(poses=None):
+        mv, via, tr = (partial(f, poses=poses) for f in (uFactory_xArm._mv, uFactory_xArm._via, uFactory_xArm._transfer))
+        return [mv("offsethome"),
+                tr("userroute_a_out"), tr("userroute_b"), tr("userroute_c"), tr("userroute_d", wait=True),
+                mv("userarea"), Grip(130),
+                via("userroute_d", wait=True), tr("userroute_c"), tr("userroute_b"), tr("userroute_a_in"),
+                mv("offsethome"), Grip(0)]
+
+    @staticmethod
+    def plan_pick_sample_from_userarea(poses=None):
+        mv, via, tr = (partial(f, poses=poses) for f in (uFactory_xArm._mv, uFactory_xArm._via, uFactory_xArm._transfer))
+        return [mv("offsethome"),
+                tr("userroute_a_in"), tr("userroute_b"), tr("userroute_c"), tr("userroute_d", wait=True),
+                Grip(130, overlap=True), mv("userarea"), Grip(0, grasp=True),
+                via("userroute_d", wait=True), tr("userroute_c"), tr("userroute_b"), tr("userroute_a_in"),
+                mv("offsethome")]
+
+    @staticmethod
+    def plan_place_sample_to_measurementstation(poses=None):
+        mv, via = (partial(f, poses=poses) for f in (uFactory_xArm._mv, uFactory_xArm._via))
+        return [mv("offsethome"), mv("measurementstation"), Grip(130),
+                via("measurementstation_retreat"), mv("offsethome"), Grip(0)]
+
+    @staticmethod
+    def plan_pick_sample_from_measurementstation(poses=None):
+        mv, via = (partial(f, poses=poses) for f in (uFactory_xArm._mv, uFactory_xArm._via))
+        return [mv("offsethome"), via("measurementstation_retreat", wait=True),
+                Grip(130, overlap=True),
+                mv("measurementstation"), Grip(0, grasp=True), mv("offsethome")]
 
     # MID LEVEL FUNCTIONS
     
     @staticmethod
     def go_home():
         print("Going home...")
-        uFactory_xArm.move_to(uFactory_xArm.home)
+        uFactory_xArm.run(uFactory_xArm.plan_go_home())
 
     @staticmethod
     def pick_sample_from_bed(i:int):
         print(f"Picking sample {i} from bed...")
-        if not (1 <= i <= 5): raise ValueError("i must be 1..5")
-        above = getattr(uFactory_xArm, f"sample{i}above")
-        pose  = getattr(uFactory_xArm, f"sample{i}")
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.move_to(above)
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.move_to(pose)
-        uFactory_xArm.gripper_close()
-        uFactory_xArm.move_to(above)
+        uFactory_xArm.run(uFactory_xArm.plan_pick_sample_from_bed(i))
 
     @staticmethod
     def place_sample_to_bed(i:int):
         print(f"Placing sample to bed slot {i}...")
-        if not (1 <= i <= 5): raise ValueError("i must be 1..5")
-        above = getattr(uFactory_xArm, f"sample{i}above")
-        pose  = getattr(uFactory_xArm, f"sample{i}")
-        uFactory_xArm.move_to(above)
-        uFactory_xArm.move_to(pose)
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.move_to(above)
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.gripper_close()
+        uFactory_xArm.run(uFactory_xArm.plan_place_sample_to_bed(i))
 
     @staticmethod
     def place_sample_to_userarea():
         print("Placing sample to user area...")
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.arm.set_position(x=263,y=-270,z=185,roll=180,pitch=0,yaw=0,
-                        speed=300, radius=20, wait=False)   # 20 mm blend
-        uFactory_xArm.arm.set_position(x=45,y=-270,z=215,roll=180,pitch=0,yaw=-120,
-                        speed=300, radius=20, wait=False)   
-        uFactory_xArm.arm.set_position(x=-250,y=-85,z=300,roll=180,pitch=0,yaw=-160,
-                        speed=300, radius=20, wait=False)  
-        uFactory_xArm.arm.set_position(x=-742,y=-229,z=162,roll=90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=True)   
-        uFactory_xArm.move_to(uFactory_xArm.userarea)
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.arm.set_position(x=-742,y=-229,z=162,roll=90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=True)   
-        uFactory_xArm.arm.set_position(x=-250,y=-85,z=300,roll=180,pitch=0,yaw=-160,
-                        speed=300, radius=20, wait=False)  
-        uFactory_xArm.arm.set_position(x=45,y=-270,z=215,roll=180,pitch=0,yaw=-120,
-                        speed=300, radius=20, wait=False)    
-        uFactory_xArm.arm.set_position(x=263,y=0,z=185,roll=180,pitch=0,yaw=0,
-                        speed=300, radius=20, wait=False)   # 20 mm blend
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.gripper_close()
+        uFactory_xArm.run(uFactory_xArm.plan_place_sample_to_userarea(), route="place_sample_to_userarea")
 
     @staticmethod
     def pick_sample_from_userarea():
         print("Picking sample from user area...")
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.arm.set_position(x=263,y=0,z=185,roll=180,pitch=0,yaw=0,
-                        speed=300, radius=20, wait=False)   # 20 mm blend
-        uFactory_xArm.arm.set_position(x=45,y=-270,z=215,roll=180,pitch=0,yaw=-120,
-                        speed=300, radius=20, wait=False)    # stop at final
-        uFactory_xArm.arm.set_position(x=-250,y=-85,z=300,roll=180,pitch=0,yaw=-160,
-                        speed=300, radius=20, wait=False)    # stop at final
-        uFactory_xArm.arm.set_position(x=-742,y=-229,z=162,roll=90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=True)   
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.move_to(uFactory_xArm.userarea)
-        uFactory_xArm.gripper_close()
-        uFactory_xArm.arm.set_position(x=-742,y=-229,z=162,roll=90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=True)   
-        uFactory_xArm.arm.set_position(x=-250,y=-85,z=300,roll=180,pitch=0,yaw=-160,
-                        speed=300, radius=20, wait=False)    # stop at final
-        uFactory_xArm.arm.set_position(x=45,y=-270,z=215,roll=180,pitch=0,yaw=-120,
-                        speed=300, radius=20, wait=False)    # stop at final
-        uFactory_xArm.arm.set_position(x=263,y=0,z=185,roll=180,pitch=0,yaw=0,
-                        speed=300, radius=20, wait=False)   # 20 mm blend
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
+        uFactory_xArm.run(uFactory_xArm.plan_pick_sample_from_userarea(), route="pick_sample_from_userarea")
 
     @staticmethod
     def place_sample_to_measurementstation():
         print("Placing sample to measurement station...")
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.move_to(uFactory_xArm.measurementstation)
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.arm.set_position(x=500,y=-397,z=59,roll=-90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=False)
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.gripper_close()
+        uFactory_xArm.run(uFactory_xArm.plan_place_sample_to_measurementstation())
 
     @staticmethod
     def pick_sample_from_measurementstation():
         print("Picking sample from measurement station...")
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
-        uFactory_xArm.arm.set_position(x=500,y=-397,z=59,roll=-90,pitch=0,yaw=-90,
-                        speed=300, radius=20, wait=True)
-        uFactory_xArm.gripper_open()
-        uFactory_xArm.move_to(uFactory_xArm.measurementstation)
-        uFactory_xArm.gripper_close()
-        uFactory_xArm.move_to(uFactory_xArm.offsethome)
+        uFactory_xArm.run(uFactory_xArm.plan_pick_sample_from_measurementstation())
 
 
+uFactory_xArm._live = ArmContext()
 
+if os.getenv("XARM_TUNED_POSES"):
+    uFactory_xArm.load_tuned(os.environ["XARM_TUNED_POSES"])
@@ -0,0 +1,84 @@
+# routes.py
+
+import statistics, time
+
+
+class RouteCache:
+    """
+    Fixed motion programs (the user-area routes) compiled once into
+    ready-to-send command buffers: optimized, pre-flight checked, blended and
+    load-profiled, with joint targets already solved into the IK cache.
+
+    Entries are keyed by route name and a fingerprint of the raw program and
+    every setting compile() reads, workspace limits included, so editing a
+    pose, profile or keep-out rebuilds only the routes it touches. A hit skips
+    planning entirely, and _exec hands each blended run of the buffer to the
+    session as one queue item (RobotSession.play), so the command thread is
+    woken once per stop instead of once per waypoint. The controller still
+    gets one command per waypoint.
+    """
+
+    def __init__(self):
+        self._buf = {}
+        self.hits = self.builds = 0
+        self.build_s = 0.0      # compile time spent on misses; each hit saves about build_s / builds
+
+    @staticmethod
+    def fingerprint(prog, P, U):
+        return repr((prog, P.loaded, U.BLEND, U.BLEND_RADIUS, sorted(U.SEGMENT_PROFILES.items(), key=repr),
+                     P.LOAD_PROFILES, P.WORKSPACE.fingerprint(), P.JOINT_TRANSFER, P.JOINT_SPEED))
+
+    def get(self, name, prog, P, U, compile):
+        """Compiled buffer for route `name`; compile(prog) runs only when the fingerprint changed."""
+        key = self.fingerprint(prog, P, U)
+        entry = self._buf.get(name)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            P.load_gain_s += entry[2]
+            return entry[1]
+        t0, g0 = time.perf_counter(), P.load_gain_s
+        buf = compile(prog)
+        self.build_s += time.perf_counter() - t0
+        self.builds += 1
+        self._buf[name] = (key, buf, P.load_gain_s - g0)
+        return buf
+
+    def clear(self):
+        self._buf.clear()
+
+    def stats(self):
+        return {"routes": sorted(self._buf), "hits": self.hits, "builds": self.builds,
+                "build_ms_mean": round(1000 * self.build_s / self.builds, 3) if self.builds else None}
+
+
+def benchmark(n=20, time_scale=None):
+    """
+    Run the user-area round trip n times with and without the route cache on a
+    simulator. Reports host seconds per execution (mean, stdev), and per
+    execution the controller calls, motion commands and session queue items.
+    """
+    from robotmotion import uFactory_xArm as U
+    from simarm import SimXArmAPI
+    from session import RobotSession
+    out = {}
+    for cached in (False, True):
+        U.connect(sim=True, time_scale=time_scale)
+        sim, session = U._layer(SimXArmAPI), U._layer(RobotSession)
+        sim.samples.append([float(v) for v in U.userarea[:3]])     # something to pick, or the grasp check aborts
+        U.ROUTES.clear()
+        spans = []
+        for _ in range(n):
+            calls0, sent = sum(sim.calls.values()), sim.calls["set_position"] + sim.calls["set_servo_angle"]
+            items0 = session.items
+            t0 = time.perf_counter()
+            for name in ("pick_sample_from_userarea", "place_sample_to_userarea"):
+                U.run(getattr(U, f"plan_{name}")(), route=name if cached else None)
+            spans.append(time.perf_counter() - t0)
+            calls, items = sum(sim.calls.values()) - calls0, session.items - items0
+        out["cached" if cached else "streamed"] = {
+            "host_s_mean": round(statistics.mean(spans), 5), "host_s_stdev": round(statistics.stdev(spans), 5),
+            "controller_calls": calls,
+            "motion_commands": sim.calls["set_position"] + sim.calls["set_servo_angle"] - sent,
+            "session_items": items}
+        U.disconnect()
+    return out
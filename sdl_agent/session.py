@@ -0,0 +1,180 @@
+# session.py
+
+import queue, threading, time
+from concurrent.futures import Future
+
+NOT_CONNECTED = -1      # xArm SDK APIState.NOT_CONNECTED
+WAIT_FINISH_TIMEOUT = 100   # xArm SDK APIState.WAIT_FINISH_TIMEOUT
+EMERGENCY_STOP = -9         # xArm SDK APIState.EMERGENCY_STOP, a wait that ended with the arm stopped
+_MOTION_CALLS = {"set_position", "set_servo_angle"}
+
+
+class RobotSession:
+    """
+    Owns one XArmAPI handle and serializes everything sent to it: every
+    command is queued and sent by a single command thread, so a tool call, a
+    telemetry reader and a UI poll never share the socket at the same time.
+
+    Blocking moves are sent with wait=False and the caller then waits on the
+    report-socket state, the way the SDK's own wait does, so the command
+    thread stays free for the gripper commands an overlapped grip sends
+    mid-move. Read-only status (pose, joint angles, state, error/warning
+    codes) is answered from the report-socket values the SDK caches, without
+    a round trip. While disconnected those reads fall back to the queue, which
+    answers NOT_CONNECTED like the SDK.
+    """
+
+    def __init__(self, arm, poll=0.01, tol=0.5, report_s=0.25, wait_timeout=120.0):
+        self._arm = arm
+        self.poll = poll                    # seconds between report checks while waiting
+        self.tol = tol                      # mm / deg from the target that counts as arrived
+        self.report_s = report_s            # stopped this long ends a wait without a known target
+        self.wait_timeout = wait_timeout
+        self._q = queue.Queue()
+        self.items = 0                      # queue items handed to the command thread
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    # ----- command channel -----
+
+    def _loop(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            fut, fn, args, kwargs = item
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fut.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    fut.set_exception(e)
+
+    def _submit(self, fn, *args, **kwargs):
+        if threading.current_thread() is self._thread:
+            return fn(*args, **kwargs)
+        fut = Future()
+        self._q.put((fut, fn, args, kwargs))
+        self.items += 1
+        return fut.result()
+
+    def call(self, name, *args, **kwargs):
+        """Send one command through the queue and return its result."""
+        return self._submit(getattr(self._arm, name), *args, **kwargs)
+
+    def play(self, cmds):
+        """
+        Send a run of motion commands [(name, kwargs), ...] as one queue item,
+        back to back with wait=False, then wait for the last one if it asked to.
+        Returns (code, sent): the first non-zero code, or the wait's, and how
+        many commands the controller took, so the caller can resume after a
+        failure instead of re-sending the run.
+        """
+        def send():
+            for k, (name, kw) in enumerate(cmds):
+                ret = getattr(self._arm, name)(**dict(kw, wait=False))
+                if ret not in (0, None):
+                    return ret, k
+            return 0, len(cmds)
+        code, sent = self._submit(send)
+        name, kw = cmds[-1]
+        if code in (0, None) and kw.get("wait"):
+            code = self._wait_motion(self._target(name, (), kw), kw.get("timeout"))
+        return code, sent
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join()
+
+    def _target(self, name, args, kwargs):
+        # (report property, target values) a finished move must show; None for relative moves.
+        if args or kwargs.get("relative"):
+            return None
+        if name == "set_position":
+            vals = [kwargs.get(k) for k in ("x", "y", "z")]
+            return None if None in vals else ("position", vals)
+        angle = kwargs.get("angle")
+        return None if angle is None or kwargs.get("servo_id") is not None else ("angles", list(angle)[:6])
+
+    def _wait_motion(self, target, timeout=None):
+        # Done once the report shows the arm at rest at the target. Without a known
+        # target it must stay at rest for report_s, as the report may lag the command.
+        # Like the SDK's wait: stopped (state 4, or 5 for 20 polls) is EMERGENCY_STOP,
+        # paused (3) keeps waiting, and no arrival before the timeout is WAIT_FINISH_TIMEOUT.
+        arm = self._arm
+        deadline = time.time() + (timeout or self.wait_timeout)
+        since, state5 = None, 0
+        while time.time() < deadline:
+            if not getattr(arm, "connected", True):
+                return NOT_CONNECTED
+            if getattr(arm, "error_code", 0):
+                return arm.error_code
+            state = arm.state
+            state5 = state5 + 1 if state == 5 else 0
+            if state == 4 or state5 >= 20:
+                return EMERGENCY_STOP
+            if state in (1, 3, 5):
+                since = None
+            elif target is not None:
+                prop, vals = target
+                cur = getattr(arm, prop)
+                if all(abs((c - v + 180) % 360 - 180) <= self.tol if prop == "angles" else abs(c - v) <= self.tol
+                       for c, v in zip(cur, vals)):
+                    return 0
+            else:
+                since = since or time.time()
+                if time.time() - since >= self.report_s:
+                    return 0
+            time.sleep(self.poll)
+        return WAIT_FINISH_TIMEOUT
+
+    def _motion(self, name, *args, **kwargs):
+        wait = kwargs.pop("wait", False)
+        ret = self.call(name, *args, wait=False, **kwargs)
+        if wait and ret in (0, None):
+            return self._wait_motion(self._target(name, args, kwargs), kwargs.get("timeout"))
+        return ret
+
+    # ----- cached status -----
+
+    def _reported(self):
+        return getattr(self._arm, "connected", True)
+
+    def get_position(self, is_radian=False, **kwargs):
+        if self._reported() and not is_radian and not kwargs:
+            return 0, list(self._arm.position)
+        return self.call("get_position", is_radian=is_radian, **kwargs)
+
+    def get_servo_angle(self, servo_id=None, is_radian=False, **kwargs):
+        if self._reported() and servo_id is None and not is_radian and not kwargs:
+            return 0, list(self._arm.angles)
+        return self.call("get_servo_angle", servo_id=servo_id, is_radian=is_radian, **kwargs)
+
+    def get_state(self):
+        if self._reported():
+            return 0, self._arm.state
+        return self.call("get_state")
+
+    def get_err_warn_code(self, show=False):
+        if self._reported() and not show:
+            return 0, [self._arm.error_code, self._arm.warn_code]
+        return self.call("get_err_warn_code", show=show)
+
+    def status(self):
+        """Snapshot for UI polls: {connected, state, mode, error, warn, pose}, no round trip."""
+        arm = self._arm
+        return {"connected": self._reported(), "state": arm.state, "mode": getattr(arm, "mode", None),
+                "error": arm.error_code, "warn": arm.warn_code, "pose": list(arm.position)[:6]}
+
+    def disconnect(self, *args, **kwargs):
+        try:
+            return self.call("disconnect", *args, **kwargs)
+        finally:
+            self.close()
+
+    def __getattr__(self, name):
+        attr = getattr(self._arm, name)
+        if not callable(attr):
+            return attr
+        if name in _MOTION_CALLS:
+            return lambda *a, **kw: self._motion(name, *a, **kw)
+        return lambda *a, **kw: self.call(name, *a, **kw)
@@ -0,0 +1,145 @@
+# shadow.py
+
+import time
+from collections import Counter, defaultdict
+
+# Configuration setters whose effect is fully described by their arguments.
+_CONFIG_CALLS = {
+    "set_gripper_enable", "set_gripper_mode", "set_gripper_speed",
+    "set_mode", "set_state", "motion_enable",
+}
+# Passthrough calls that never move the arm.
+_NON_MOTION_CALLS = {"set_gripper_position", "clean_warn", "disconnect"}
+_POSE_KEYS = ("x", "y", "z", "roll", "pitch", "yaw")
+
+
+def _code_of(ret):
+    if isinstance(ret, tuple):
+        return ret[0] if ret else 0
+    return ret if isinstance(ret, int) and not isinstance(ret, bool) else 0
+
+
+class ShadowArm:
+    """
+    Wraps an XArmAPI handle and keeps a shadow copy of the controller
+    configuration (gripper enable/mode/speed, motion mode/state/enable and the
+    last pose the arm settled at). Commands that would not change anything are
+    answered locally. Any non-zero return code, clean_error() or reconnect
+    drops the whole shadow.
+    """
+
+    def __init__(self, arm, rtt_ms=2.0, pose_tol=1e-3):
+        self._arm = arm
+        self.rtt_ms = rtt_ms
+        self.pose_tol = pose_tol
+        self._config = {}
+        self._pose = None           # pose the arm last settled at
+        self.reset_stats()
+
+    # ----- shadow state -----
+
+    def invalidate(self):
+        self._config.clear()
+        self._pose = None
+
+    def reset_stats(self):
+        self.forwarded = Counter()
+        self.skipped = Counter()
+        self._lat = defaultdict(lambda: [0, 0.0])   # name -> [n, total_s] of non-blocking calls
+
+    def _mean_ms(self, name):
+        n, total = self._lat[name]
+        return 1000.0 * total / n if n else self.rtt_ms
+
+    def stats(self):
+        saved = {k: n * self._mean_ms(k) for k, n in self.skipped.items()}
+        return {
+            "forwarded": sum(self.forwarded.values()),
+            "skipped": sum(self.skipped.values()),
+            "saved_ms": round(sum(saved.values()), 3),
+            "skipped_by_command": dict(self.skipped),
+            "saved_ms_by_command": {k: round(v, 3) for k, v in saved.items()},
+        }
+
+    def _forward(self, name, *args, **kwargs):
+        t0 = time.perf_counter()
+        ret = getattr(self._arm, name)(*args, **kwargs)
+        dt = time.perf_counter() - t0
+        self.forwarded[name] += 1
+        if not kwargs.get("wait"):
+            lat = self._lat[name]; lat[0] += 1; lat[1] += dt
+        if _code_of(ret) != 0:
+            self.invalidate()
+        return ret
+
+    def _skip(self, name):
+        self.skipped[name] += 1
+        return 0
+
+    # ----- intercepted calls -----
+
+    def _config_call(self, name, *args, **kwargs):
+        key = (name, kwargs.get("servo_id"))
+        val = (args, tuple(sorted((k, v) for k, v in kwargs.items() if k != "servo_id")))
+        if self._config.get(key) == val:
+            return self._skip(name)
+        ret = self._forward(name, *args, **kwargs)
+        if _code_of(ret) == 0:
+            self._config[key] = val
+            if name in ("set_mode", "set_state", "motion_enable"):
+                self._pose = None
+        return ret
+
+    def set_position(self, *args, **kwargs):
+        relative = kwargs.get("relative", False)
+        target = None if args or relative else tuple(kwargs.get(k) for k in _POSE_KEYS)
+        if target is not None and None not in target and self._pose is not None:
+            if max(abs(a - b) for a, b in zip(target, self._pose)) <= self.pose_tol:
+                return self._skip("set_position")
+        ret = self._forward("set_position", *args, **kwargs)
+        # Only a completed blocking move tells us where the arm is.
+        ok = _code_of(ret) == 0 and kwargs.get("wait") and target is not None and None not in target
+        self._pose = target if ok else None
+        return ret
+
+    def play(self, cmds):
+        # A run of motion commands (RobotSession.play): a leading move to the settled pose is
+        # dropped as in set_position, and the run ends where its last blocking move put the arm.
+        skip = 0
+        name, kw = cmds[0]
+        if name == "set_position" and self._pose is not None and not kw.get("relative"):
+            target = tuple(kw.get(k) for k in _POSE_KEYS)
+            if None not in target and max(abs(a - b) for a, b in zip(target, self._pose)) <= self.pose_tol:
+                self._skip("set_position")
+                skip = 1
+        if skip == len(cmds):
+            return 0, skip
+        self._pose = None
+        code, sent = self._forward("play", cmds[skip:])
+        name, kw = cmds[-1]
+        target = tuple(kw.get(k) for k in _POSE_KEYS)
+        if code == 0 and name == "set_position" and kw.get("wait") and not kw.get("relative") and None not in target:
+            self._pose = target
+        return code, skip + sent
+
+    def clean_error(self, *args, **kwargs):
+        self.invalidate()
+        return self._forward("clean_error", *args, **kwargs)
+
+    def connect(self, *args, **kwargs):
+        self.invalidate()
+        return self._forward("connect", *args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._arm, name)
+        if name in _CONFIG_CALLS:
+            return lambda *a, **kw: self._config_call(name, *a, **kw)
+        if not callable(attr):
+            return attr
+        if name.startswith("get_") or name in _NON_MOTION_CALLS:
+            return lambda *a, **kw: self._forward(name, *a, **kw)
+
+        def passthrough(*a, **kw):
+            self._pose = None       # unknown command, it may have moved the arm
+            return self._forward(name, *a, **kw)
+        return passthrough
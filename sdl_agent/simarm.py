@@ -0,0 +1,449 @@
+# simarm.py
+
+import functools
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+
+NOT_CONNECTED = -1      # xArm SDK APIState.NOT_CONNECTED
+
+
+def trapezoid_time(d, v, a):
+    """Duration of a rest-to-rest move of length d with cruise speed v and acceleration a."""
+    if d <= 0 or v <= 0:
+        return 0.0
+    if a <= 0:
+        return d / v
+    if d >= v * v / a:
+        return d / v + v / a
+    return 2.0 * math.sqrt(d / a)
+
+
+def _angle_delta(a, b):
+    return abs((b - a + 180.0) % 360.0 - 180.0)
+
+
+# Toy kinematics: invertible and smooth enough for timing, not the real xArm chain.
+def sim_ik(pose):
+    x, y, z, roll, pitch, yaw = pose[:6]
+    base = math.degrees(math.atan2(y, x))
+    return [base, math.hypot(x, y) / 10.0, z / 10.0, roll, pitch, yaw - base]
+
+
+def sim_fk(joints):
+    base, r, z, roll, pitch, yaw = joints[:6]
+    r *= 10.0
+    return [r * math.cos(math.radians(base)), r * math.sin(math.radians(base)), z * 10.0,
+            roll, pitch, (yaw + base + 180.0) % 360.0 - 180.0]
+
+
+def _online(offline_ret):
+    # Like the SDK, calls made while disconnected return NOT_CONNECTED instead of raising.
+    # In timed mode the round trip is slept off by the calling thread, outside the lock.
+    def deco(f):
+        @functools.wraps(f)
+        def call(self, *args, **kwargs):
+            if not self.connected:
+                return offline_ret
+            if self.time_scale:
+                time.sleep(self.cmd_latency / self.time_scale)
+            return f(self, *args, **kwargs)
+        return call
+    return deco
+
+
+class SimXArmAPI:
+    """
+    In-process stand-in for xarm.wrapper.XArmAPI.
+
+    Implements the calls uFactory_xArm makes and advances a virtual clock with
+    trapezoidal velocity profiles so durations track the real cell.
+    time_scale=1.0 runs in real time, 10.0 ten times faster, None never sleeps.
+    """
+
+    def __init__(self, port=None, is_radian=False, time_scale=None,
+                 mvacc=2000.0, rot_speed=90.0, rot_acc=500.0,
+                 cmd_latency=0.005, settle=0.15, grip_rate=0.11, joint_acc=500.0,
+                 max_speed=1000.0, max_joint_speed=180.0, start_pose=(310, -2.5, 7.5, -180, -15, 0),
+                 samples=None, grasp_width=30.0, grasp_radius=15.0, miss_rate=0.0, seed=None, **kwargs):
+        self.port = port
+        self.is_radian = is_radian
+        self.time_scale = time_scale
+        self.mvacc = mvacc
+        self.rot_speed = rot_speed
+        self.rot_acc = rot_acc
+        self.cmd_latency = cmd_latency
+        self.settle = settle
+        self.grip_rate = grip_rate
+        self.joint_acc = joint_acc
+        self.max_speed = max_speed              # the controller clamps faster commands
+        self.max_joint_speed = max_joint_speed
+
+        self.connected = True
+        self._down_until = 0.0
+        self.mode = 0
+        self._state = 4
+        self.error_code = 0
+        self.warn_code = 0
+        self.motion_enabled = False
+        self.calls = Counter()
+
+        self._lock = threading.RLock()
+        self._t = 0.0
+        self._wall = time.time()
+        self._pose = list(start_pose)       # pose at the end of the motion queue
+        self._segments = deque()            # (t0, t1, p0, p1)
+        self._motion_end = 0.0
+        self._blend_prev = False
+        self._prev_speed = 0.0
+
+        self._grip_enabled = False
+        self._grip_mode = 0
+        self._grip_speed = 0
+        self._grip_from = 0.0
+        self._grip_to = 0.0
+        self._grip_t0 = 0.0
+        self._grip_t1 = 0.0
+
+        # Grasp model: closing within grasp_radius of a sample stops the jaws at
+        # grasp_width, unless the pick misses (miss_rate, or miss_next()).
+        # samples=None turns it off and every close reaches its target.
+        self.samples = None if samples is None else [[float(v) for v in p[:3]] for p in samples]
+        self.grasp_width = grasp_width
+        self.grasp_radius = grasp_radius
+        self.miss_rate = miss_rate
+        self.misses = 0
+        self._rng = random.Random(seed)
+        self._force_miss = 0
+        self._held = None               # index into samples while the jaws hold one
+
+    # ----- virtual clock -----
+
+    @property
+    def clock(self):
+        """Simulated seconds since construction."""
+        with self._lock:
+            self._sync()
+            return self._t
+
+    def _sync(self):
+        now = time.time()
+        if self.time_scale:
+            self._t += (now - self._wall) * self.time_scale
+        self._wall = now
+
+    def _advance_to(self, t_end):
+        self._sync()
+        if t_end > self._t:
+            if self.time_scale:
+                time.sleep((t_end - self._t) / self.time_scale)
+                self._sync()
+            self._t = max(self._t, t_end)
+
+    def _settle_queries(self, t_end):
+        # Status polls cannot observe real sleeps in instant mode, so jump to completion.
+        if not self.time_scale:
+            self._advance_to(t_end)
+        else:
+            self._sync()
+
+    def _cmd(self, name):
+        # Latency is the caller's, not the motion's: timed mode sleeps it in _online, and
+        # instant mode charges it to the clock for commands only, so status polls from
+        # other threads never shift the motion timeline.
+        self.calls[name] += 1
+        if not self.time_scale and not name.startswith("get_"):
+            self._t += self.cmd_latency
+
+    # ----- motion model -----
+
+    def move_duration(self, p0, p1, speed, mvacc=None):
+        a = mvacc or self.mvacc
+        d = math.dist(p0[:3], p1[:3])
+        rot = max(_angle_delta(p0[i], p1[i]) for i in range(3, 6))
+        return max(trapezoid_time(d, speed, a),
+                   trapezoid_time(rot, self.rot_speed, self.rot_acc))
+
+    def joint_move_duration(self, j0, j1, speed, mvacc=None):
+        a = mvacc or self.joint_acc
+        return max(trapezoid_time(_angle_delta(p, q), speed, a) for p, q in zip(j0, j1))
+
+    def _pose_at(self, t):
+        while self._segments and self._segments[0][1] <= t:
+            self._segments.popleft()
+        if not self._segments:
+            return list(self._pose)
+        t0, t1, p0, p1 = self._segments[0]
+        if t <= t0:
+            return list(p0)
+        f = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+        return [a + (b - a) * f for a, b in zip(p0, p1)]
+
+    def _queue_motion(self, target, duration, speed, radius, wait):
+        start = max(self._t, self._motion_end)
+        if self._blend_prev and self._motion_end > self._t:
+            # Blended corner: the decel/accel pair at the previous waypoint is skipped.
+            prev_dur = self._segments[-1][1] - self._segments[-1][0] if self._segments else 0.0
+            saving = min(self._prev_speed, speed) / self.mvacc
+            start -= min(saving, 0.5 * prev_dur, 0.5 * duration)
+        end = start + duration
+        self._segments.append((start, end, list(self._pose), list(target)))
+        self._pose = list(target)
+        self._motion_end = end
+        self._prev_speed = speed
+        self._blend_prev = bool(radius) and radius > 0 and not wait
+        self._state = 1
+        return end + self.settle
+
+    def _wait_until(self, t_end):
+        # Sleep without the lock so other threads can poll a blocking move.
+        with self._lock:
+            self._sync()
+            remaining = t_end - self._t
+        if remaining > 0 and self.time_scale:
+            time.sleep(remaining / self.time_scale)
+        with self._lock:
+            self._advance_to(t_end)
+
+    def _finish_motion(self, t_end, wait):
+        if wait:
+            self._wait_until(t_end)
+            with self._lock:
+                if self._state == 1 and self._t >= self._motion_end:
+                    self._state = 2
+        return 0
+
+    # ----- XArmAPI surface -----
+
+    @_online(NOT_CONNECTED)
+    def clean_warn(self):
+        with self._lock:
+            self._cmd("clean_warn"); self.warn_code = 0
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def clean_error(self):
+        with self._lock:
+            self._cmd("clean_error"); self.error_code = 0
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def motion_enable(self, enable=True, servo_id=None):
+        with self._lock:
+            self._cmd("motion_enable"); self.motion_enabled = bool(enable)
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def set_mode(self, mode=0):
+        with self._lock:
+            self._cmd("set_mode"); self.mode = mode
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def set_state(self, state=0):
+        with self._lock:
+            self._cmd("set_state")
+            self._state = 2 if state == 0 else state
+            return 0
+
+    @_online((NOT_CONNECTED, None))
+    def get_state(self):
+        with self._lock:
+            self._cmd("get_state")
+            self._settle_queries(self._motion_end)
+            if self._state == 1 and self._t >= self._motion_end:
+                self._state = 2
+            return 0, self._state
+
+    def get_is_moving(self):
+        return self.get_state()[1] == 1
+
+    @_online((NOT_CONNECTED, None))
+    def get_err_warn_code(self, show=False):
+        with self._lock:
+            self._cmd("get_err_warn_code")
+            return 0, [self.error_code, self.warn_code]
+
+    @_online(NOT_CONNECTED)
+    def set_position(self, x=None, y=None, z=None, roll=None, pitch=None, yaw=None,
+                     radius=None, speed=None, mvacc=None, mvtime=None, relative=False,
+                     is_radian=None, wait=False, timeout=None, **kwargs):
+        with self._lock:
+            self._cmd("set_position")
+            if self.error_code:
+                return 1
+            vals = [x, y, z, roll, pitch, yaw]
+            if relative:
+                target = [p + (v or 0.0) for p, v in zip(self._pose, vals)]
+            else:
+                target = [p if v is None else v for p, v in zip(self._pose, vals)]
+            spd = min(speed or 100, self.max_speed)
+            dur = self.move_duration(self._pose, target, spd, mvacc)
+            t_end = self._queue_motion(target, dur, spd, radius, wait)
+        return self._finish_motion(t_end, wait)
+
+    @_online((NOT_CONNECTED, None))
+    def get_inverse_kinematics(self, pose, input_is_radian=None, return_is_radian=None):
+        with self._lock:
+            self._cmd("get_inverse_kinematics")
+            return 0, sim_ik(pose)
+
+    @_online((NOT_CONNECTED, None))
+    def get_forward_kinematics(self, angles, input_is_radian=None, return_is_radian=None):
+        with self._lock:
+            self._cmd("get_forward_kinematics")
+            return 0, sim_fk(angles)
+
+    @_online(NOT_CONNECTED)
+    def set_servo_angle(self, servo_id=None, angle=None, speed=None, mvacc=None, mvtime=None,
+                        relative=False, is_radian=None, wait=False, timeout=None, radius=None, **kwargs):
+        with self._lock:
+            self._cmd("set_servo_angle")
+            if self.error_code:
+                return 1
+            j0 = sim_ik(self._pose)
+            j1 = [a + b for a, b in zip(j0, angle)] if relative else list(angle[:6])
+            spd = min(speed or 20, self.max_joint_speed)
+            dur = self.joint_move_duration(j0, j1, spd, mvacc)
+            t_end = self._queue_motion(sim_fk(j1), dur, spd, radius, wait)
+        return self._finish_motion(t_end, wait)
+
+    @_online((NOT_CONNECTED, None))
+    def get_servo_angle(self, servo_id=None, is_radian=None):
+        with self._lock:
+            self._cmd("get_servo_angle")
+            self._settle_queries(self._motion_end)
+            return 0, sim_ik(self._pose_at(self._t))
+
+    @_online((NOT_CONNECTED, None))
+    def get_position(self, is_radian=None):
+        with self._lock:
+            self._cmd("get_position")
+            self._settle_queries(self._motion_end)
+            return 0, self._pose_at(self._t)
+
+    # Report-socket properties keep their last value while disconnected.
+    @property
+    def state(self):
+        # Reported as moving until the motion has ended and settled, the point a blocking call returns.
+        with self._lock:
+            if self._state == 1 and self.connected:
+                done = self._motion_end + self.settle
+                self._settle_queries(done)
+                if self._t >= done:
+                    self._state = 2
+            return self._state
+
+    @state.setter
+    def state(self, value):
+        self._state = value
+
+    def _reported_pose(self):
+        with self._lock:
+            if self.connected:
+                self._settle_queries(self._motion_end)
+            return self._pose_at(self._t)
+
+    @property
+    def position(self):
+        return self._reported_pose()
+
+    @property
+    def angles(self):
+        return sim_ik(self._reported_pose())
+
+    @_online(NOT_CONNECTED)
+    def set_gripper_enable(self, enable, **kwargs):
+        with self._lock:
+            self._cmd("set_gripper_enable"); self._grip_enabled = bool(enable)
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def set_gripper_mode(self, mode, **kwargs):
+        with self._lock:
+            self._cmd("set_gripper_mode"); self._grip_mode = mode
+            return 0
+
+    @_online(NOT_CONNECTED)
+    def set_gripper_speed(self, speed, **kwargs):
+        with self._lock:
+            self._cmd("set_gripper_speed"); self._grip_speed = speed
+            return 0
+
+    def _grip_pos_at(self, t):
+        if t >= self._grip_t1 or self._grip_t1 <= self._grip_t0:
+            return self._grip_to
+        f = (t - self._grip_t0) / (self._grip_t1 - self._grip_t0)
+        return self._grip_from + (self._grip_to - self._grip_from) * f
+
+    @_online(NOT_CONNECTED)
+    def set_gripper_position(self, pos, wait=False, speed=None, auto_enable=False,
+                             timeout=None, **kwargs):
+        with self._lock:
+            self._cmd("set_gripper_position")
+            if not (self._grip_enabled or auto_enable):
+                return 1
+            cur = self._grip_pos_at(self._t)
+            spd = speed or self._grip_speed or 1000
+            pos = self._grasp(cur, float(pos))
+            self._grip_from, self._grip_to = cur, pos
+            self._grip_t0 = self._t
+            self._grip_t1 = t_end = self._t + abs(pos - cur) / (spd * self.grip_rate)
+        if wait:
+            self._wait_until(t_end)
+        return 0
+
+    def miss_next(self, n=1):
+        """Make the next n closes on a sample miss it."""
+        self._force_miss += n
+
+    def _grasp(self, cur, pos):
+        # Where the jaws stop for a command to pos, updating which sample they hold.
+        if self.samples is None:
+            return pos
+        tcp = self._pose_at(self._t)[:3]
+        if pos >= cur:
+            if self._held is not None:
+                self.samples[self._held] = list(tcp)    # released where the arm is
+                self._held = None
+            return pos
+        if self._held is None:
+            near = [k for k, p in enumerate(self.samples) if math.dist(p, tcp) <= self.grasp_radius]
+            if not near:
+                return pos
+            if self._force_miss or self._rng.random() < self.miss_rate:
+                self._force_miss = max(self._force_miss - 1, 0)
+                self.misses += 1
+                return pos
+            self._held = near[0]
+        return max(pos, self.grasp_width)
+
+    @_online((NOT_CONNECTED, None))
+    def get_gripper_position(self, **kwargs):
+        with self._lock:
+            self._cmd("get_gripper_position")
+            self._settle_queries(self._grip_t1)
+            return 0, self._grip_pos_at(self._t)
+
+    def connect(self, port=None, **kwargs):
+        with self._lock:
+            if time.time() < self._down_until:
+                raise ConnectionError(f"{self.port}: controller unreachable")
+            self.connected = True
+
+    def drop(self, seconds=1.0, reset=False):
+        """Simulate a link outage of `seconds`; reset=True also power-cycles the controller state."""
+        with self._lock:
+            self.connected = False
+            self._down_until = time.time() + seconds
+            if reset:
+                self.mode, self._state, self.motion_enabled, self._grip_enabled = 0, 4, False, False
+                self._pose = self._pose_at(self._t)     # the queued motion is lost
+                self._segments.clear()
+                self._motion_end = self._t
+
+    def disconnect(self):
+        with self._lock:
+            self.connected = False
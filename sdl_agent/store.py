@@ -1,4 +1,4 @@
-import csv, json, os, time
+import csv, json, os, threading, time
 from datetime import datetime
 from pathlib import Path
 from collections import OrderedDict
@@ -12,6 +12,7 @@ BASE_DIR = Path(os.getenv("LAB_DIR", "experiment_logs")).resolve()
 BASE_DIR.mkdir(parents=True, exist_ok=True)
 
 CSV_PATH = os.getenv("LAB_CSV", str(BASE_DIR / f"{STAMP}.csv"))
+LATENCY_PATH = os.getenv("LAB_LATENCY", str(BASE_DIR / f"{STAMP}_latency.json"))
 
 FEATURE_TO_COL = {
     "OCP": "value_ocp",
@@ -26,6 +27,8 @@ FIELDNAMES = [
     "metrics", "meta",
 ]
 
+_LOCK = threading.Lock()     # several arms may log at once (pool.py)
+
 def _ensure_header():
     if not os.path.exists(CSV_PATH) or os.path.getsize(CSV_PATH) == 0:
         with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
@@ -57,6 +60,7 @@ def log_observation(obs: Observation):
     if col is not None:
         row[col] = rec.get("value")
 
-    _ensure_header()
-    with open(CSV_PATH, "a", newline="", encoding="utf-8") as f:
-        csv.DictWriter(f, fieldnames=FIELDNAMES).writerow(row)
+    with _LOCK:
+        _ensure_header()
+        with open(CSV_PATH, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=FIELDNAMES).writerow(row)
@@ -0,0 +1,157 @@
+# supervisor.py
+
+import threading, time
+from collections import Counter
+from shadow import _code_of
+
+NOT_CONNECTED = -1      # xArm SDK APIState.NOT_CONNECTED
+_READY_STATES = (1, 2)  # moving, ready
+_MOTION_CALLS = {"set_position", "set_servo_angle", "set_gripper_position"}
+_RESUMED_CALLS = {"play"}   # part of the run may have gone through; the caller resends the rest
+
+
+def initialise(arm):
+    """
+    Bring a controller to mode 0 / ready, issuing only the calls its reported
+    error, warning, mode and state say are needed. Returns the calls made.
+    """
+    done = []
+    code, ew = arm.get_err_warn_code()
+    err, warn = ew if code in (0, None) and ew else (1, 1)
+    if err:
+        arm.clean_error(); done.append("clean_error")
+    if warn:
+        arm.clean_warn(); done.append("clean_warn")
+    code, state = arm.get_state()
+    restart = bool(err) or code not in (0, None) or state not in _READY_STATES
+    if getattr(arm, "mode", None) not in (0, None):
+        arm.set_mode(0); done.append("set_mode")
+        restart = True      # a mode change only takes effect after set_state(0)
+    if restart:
+        arm.motion_enable(True); arm.set_state(0)
+        done += ["motion_enable", "set_state"]
+    return done
+
+
+class SupervisedArm:
+    """
+    Wraps an XArmAPI handle with a heartbeat thread. When the link drops it
+    reconnects with exponential backoff and re-runs initialise(), which only
+    restores what the controller lost. A command answered with NOT_CONNECTED
+    never reached the controller, so it is held until the link is back and
+    sent again; a short drop costs its own length instead of the queue.
+    If the controller had to be restarted, queued motion may be lost, so held
+    motion commands fail instead of resuming a stream with a gap in it.
+    """
+
+    def __init__(self, arm, heartbeat=1.0, backoff=(0.25, 8.0), hold_timeout=60.0):
+        self._arm = arm
+        self.heartbeat = heartbeat
+        self.backoff = backoff
+        self.hold_timeout = hold_timeout
+        self._up = threading.Event()
+        self._up.set()
+        self._kick = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.restarts = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counters = Counter()       # heartbeats, drops, reconnects, attempts, held, reinit calls
+        self.latencies = []             # seconds from noticing a drop to ready again
+
+    def stats(self):
+        lat = self.latencies
+        return {**self.counters, "connected": self._up.is_set(),
+                "reconnect_s_last": round(lat[-1], 3) if lat else None,
+                "reconnect_s_mean": round(sum(lat) / len(lat), 3) if lat else None,
+                "reconnect_s_max": round(max(lat), 3) if lat else None}
+
+    # ----- heartbeat -----
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._kick.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _alive(self):
+        try:
+            if not getattr(self._arm, "connected", True):
+                return False
+            return _code_of(self._arm.get_state()) != NOT_CONNECTED
+        except Exception:
+            return False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._kick.wait(self.heartbeat)
+            self._kick.clear()
+            if self._stop.is_set():
+                break
+            self.counters["heartbeats"] += 1
+            if self._alive():
+                self._up.set()
+            else:
+                self._recover()
+
+    def _recover(self):
+        self._up.clear()
+        self.counters["drops"] += 1
+        t0, delay = time.time(), self.backoff[0]
+        while not self._stop.is_set():
+            self.counters["attempts"] += 1
+            try:
+                self._arm.connect()
+                if self._alive():
+                    calls = initialise(self._arm)
+                    for call in calls:
+                        self.counters[call] += 1
+                    self.restarts += "set_state" in calls
+                    break
+            except Exception:
+                pass
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.backoff[1])
+        else:
+            return
+        self.latencies.append(time.time() - t0)
+        self.counters["reconnects"] += 1
+        self._up.set()
+
+    # ----- calls -----
+
+    def _call(self, name, *args, **kwargs):
+        deadline = time.time() + self.hold_timeout
+        restarts = self.restarts
+        while True:
+            ret = getattr(self._arm, name)(*args, **kwargs)
+            if _code_of(ret) != NOT_CONNECTED or self._stop.is_set() or name in _RESUMED_CALLS:
+                return ret
+            self.counters["held"] += 1
+            self._up.clear()
+            self._kick.set()
+            if not self._up.wait(max(deadline - time.time(), 0)):
+                return ret
+            if name in _MOTION_CALLS and self.restarts != restarts:
+                self.counters["dropped_after_restart"] += 1
+                return ret
+
+    def disconnect(self, *args, **kwargs):
+        self.stop()
+        return self._arm.disconnect(*args, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._arm, name)
+        if not callable(attr) or name == "connect":
+            return attr
+        return lambda *a, **kw: self._call(name, *a, **kw)
@@ -0,0 +1,112 @@
+# telemetry.py
+
+import threading
+import time
+import numpy as np
+
+SAMPLE = np.dtype([
+    ("t", "f8"),
+    ("segment", "i4"),
+    ("pose", "f4", 6),
+    ("joints", "f4", 7),
+    ("grip", "f4"),
+    ("err", "i2"),
+    ("warn", "i2"),
+    ("state", "i1"),
+])
+
+
+class TelemetrySampler:
+    """
+    Background sampler of pose, joint angles, gripper position and error codes
+    into a fixed-size NumPy ring buffer.
+
+    Pose, joints, codes and state come from the SDK's report-socket properties,
+    so only the gripper costs a controller round-trip, every grip_every samples.
+    latest() is a cached read with no round-trip at all. segment is stamped
+    into each sample so a run can be cut per motion segment afterwards.
+    """
+
+    def __init__(self, arm, rate_hz=50.0, size=4096, grip_every=5):
+        self.arm = arm
+        self.period = 1.0 / rate_hz
+        self.grip_every = grip_every
+        self.segment = -1
+        self._buf = np.zeros(size, dtype=SAMPLE)
+        self._n = 0
+        self._grip = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _read(self):
+        arm = self.arm
+        if self._n % self.grip_every == 0:
+            code, g = arm.get_gripper_position()
+            if code in (0, None) and g is not None:
+                self._grip = g
+        angles = list(arm.angles or [])[:7]
+        return (time.time(), self.segment, list(arm.position)[:6], angles + [0.0] * (7 - len(angles)),
+                self._grip, arm.error_code or 0, arm.warn_code or 0, arm.state or 0)
+
+    def _loop(self):
+        next_t = time.time()
+        while not self._stop.is_set():
+            try:
+                rec = self._read()
+            except Exception:
+                rec = None      # a dropped sample is better than a dead sampler
+            if rec is not None:
+                with self._lock:
+                    self._buf[self._n % len(self._buf)] = rec
+                    self._n += 1
+            next_t += self.period
+            self._stop.wait(max(next_t - time.time(), 0.0))
+
+    def latest(self):
+        """Most recent sample (a NumPy record) or None before the first one."""
+        with self._lock:
+            return self._buf[(self._n - 1) % len(self._buf)].copy() if self._n else None
+
+    def snapshot(self):
+        """All buffered samples, oldest first."""
+        with self._lock:
+            n, size = self._n, len(self._buf)
+            if n <= size:
+                return self._buf[:n].copy()
+            i = n % size
+            return np.concatenate((self._buf[i:], self._buf[:i]))
+
+    def export(self, path):
+        """Write the buffer as a .npy structured array; read back with load()."""
+        np.save(path, self.snapshot(), allow_pickle=False)
+
+    @staticmethod
+    def load(path):
+        return np.load(path, allow_pickle=False)
+
+    @staticmethod
+    def segment_durations(samples):
+        """{segment: seconds} from an exported buffer."""
+        out = {}
+        for seg in np.unique(samples["segment"]):
+            t = samples["t"][samples["segment"] == seg]
+            out[int(seg)] = float(t.max() - t.min())
+        return out
@@ -6,4 +6,5 @@ uFactory_xArm.connect()
 ocp_measurement(2)
 ca_measurement(1)
 bring_sample_to_user(1)
-collect_sample_from_user(1)
\ No newline at end of file
+collect_sample_from_user(1)
+print(uFactory_xArm.command_stats())
@@ -4,6 +4,74 @@ from instruments import *
 from robotmotion import *
 from store import *
 from observation import *
+from zones import *
+from preflight import check_tools
+from macros import MACROS
+from motionmodel import TOOL_CHAINS
+from contextlib import ExitStack, contextmanager
+
+def _measure(step):
+    # A dry run costs the arm only; the instruments are never touched.
+    return None if uFactory_xArm.dry_arm() is not None else step()
+
+def _preflight(obs):
+    # Reject the whole tool call before the arm moves, not at its first bad segment.
+    check_tools([(obs.meta["tool"], obs.meta["args"])])
+
+def _label(obs):
+    # "ocp_measurement(i=1)": names the call in cancel_current() and dry-run rows.
+    m = obs.meta
+    return f"{m['tool']}(" + ", ".join(f"{k}={v}" for k, v in m["args"].items()) + ")"
+
+@contextmanager
+def _call(obs, zones):
+    """
+    Frame of a tool call: preflight, its zones, cancellation, metrics and the
+    log. The body reports success with ok(**finish_ok arguments); an exception
+    becomes the Observation's error. Inside uFactory_xArm.batch() the call's
+    trailing motion stays queued, so the optimizer can merge it with the next
+    call's: the call is finished, logged and its zones released once that
+    motion has run (uFactory_xArm.defer()), and until then its status is
+    "queued".
+    """
+    held, result = ExitStack(), {}
+    cell = uFactory_xArm.context().name
+    if cell is not None:
+        obs.meta["arm"] = cell      # the pool.py cell it ran on
+    def end(err=None):
+        try:
+            if err is None:
+                finish_ok(obs, metrics=uFactory_xArm.metrics(), **result)
+            else:
+                finish_err(obs, err)
+        finally:
+            held.close()
+            _log(obs)
+    try:
+        _preflight(obs)
+        held.enter_context(uFactory_xArm.reserve(*zones))
+        with uFactory_xArm.cancellable(label=_label(obs)):
+            uFactory_xArm.reset_metrics()
+            yield result.update
+            obs.meta["status"] = "queued"
+            queued = uFactory_xArm.defer(_label(obs), end)
+    except Exception as e:
+        end(e)
+        return
+    except BaseException:
+        held.close()
+        raise
+    if not queued:
+        end()
+
+def _log(obs):
+    # A dry run closes the tool's cost row instead of logging an observation.
+    if uFactory_xArm.dry_arm() is None:
+        log_observation(obs)
+        uFactory_xArm.latency_report(LATENCY_PATH)
+        uFactory_xArm.tool_finished(obs.meta["tool"], obs.meta["args"])
+    else:
+        uFactory_xArm.dry_arm().end_step(_label(obs), obs.meta["status"], obs.meta["error"])
 
 def ocp_measurement(i: int) -> Observation:
     """
@@ -37,18 +105,13 @@ def ocp_measurement(i: int) -> Observation:
         0.123  # Example measured value
     """
     obs = start_obs(step="measurement", tool="ocp_measurement", args={"i": i})
-    try:
-        uFactory_xArm.pick_sample_from_bed(i)
-        uFactory_xArm.place_sample_to_measurementstation()
+    with _call(obs, tool_zones("ocp_measurement", i)) as ok:
+        MACROS.chain("pick_sample_from_bed", "place_sample_to_measurementstation", i=i)
         f = "OCP"
-        v = instruments.ocp_measurement_step()
-        uFactory_xArm.pick_sample_from_measurementstation()
-        uFactory_xArm.place_sample_to_bed(i)
-        obs = finish_ok(obs, feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
+        uFactory_xArm.flush()
+        v = _measure(instruments.ocp_measurement_step)
+        MACROS.chain("pick_sample_from_measurementstation", "place_sample_to_bed", i=i)
+        ok(feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
     return obs
 
 def ca_measurement(i: int) -> Observation:
@@ -83,18 +146,13 @@ def ca_measurement(i: int) -> Observation:
         0.456  # Example measured value
     """    
     obs = start_obs(step="measurement", tool="ca_measurement", args={"i": i})
-    try:
-        uFactory_xArm.pick_sample_from_bed(i)
-        uFactory_xArm.place_sample_to_measurementstation()
+    with _call(obs, tool_zones("ca_measurement", i)) as ok:
+        MACROS.chain("pick_sample_from_bed", "place_sample_to_measurementstation", i=i)
         f="CA"
-        v = instruments.ca_measurement_step()
-        uFactory_xArm.pick_sample_from_measurementstation()
-        uFactory_xArm.place_sample_to_bed(i)
-        obs = finish_ok(obs,feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
+        uFactory_xArm.flush()
+        v = _measure(instruments.ca_measurement_step)
+        MACROS.chain("pick_sample_from_measurementstation", "place_sample_to_bed", i=i)
+        ok(feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
     return obs
 
 def cv_measurement(i: int) -> Observation:
@@ -129,18 +187,13 @@ def cv_measurement(i: int) -> Observation:
         0.789  # Example measured value
     """
     obs = start_obs(step="measurement", tool="cv_measurement", args={"i": i})
-    try:
-        uFactory_xArm.pick_sample_from_bed(i)
-        uFactory_xArm.place_sample_to_measurementstation()
+    with _call(obs, tool_zones("cv_measurement", i)) as ok:
+        MACROS.chain("pick_sample_from_bed", "place_sample_to_measurementstation", i=i)
         f="CV"
-        v = instruments.cv_measurement_step()
-        uFactory_xArm.pick_sample_from_measurementstation()
-        uFactory_xArm.place_sample_to_bed(i)
-        obs = finish_ok(obs, feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
+        uFactory_xArm.flush()
+        v = _measure(instruments.cv_measurement_step)
+        MACROS.chain("pick_sample_from_measurementstation", "place_sample_to_bed", i=i)
+        ok(feature=f, sample=i, value=v, extra_meta={"pose": "measurementstation"})
     return obs
 
 def bring_sample_to_user(i: int) -> Observation:
@@ -168,14 +221,9 @@ def bring_sample_to_user(i: int) -> Observation:
         userarea
     """
     obs = start_obs(step="interraction", tool="bring_sample_to_user", args={"i": i})
-    try:
-        uFactory_xArm.pick_sample_from_bed(i)
-        uFactory_xArm.place_sample_to_userarea()
-        obs = finish_ok(obs, sample=i, extra_meta={"target": "userarea"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
+    with _call(obs, tool_zones("bring_sample_to_user", i)) as ok:
+        MACROS.chain("pick_sample_from_bed", "place_sample_to_userarea", i=i)
+        ok(sample=i, extra_meta={"target": "userarea"})
     return obs
 
 def collect_sample_from_user(i: int) -> Observation:
@@ -203,14 +251,9 @@ def collect_sample_from_user(i: int) -> Observation:
         userarea
     """
     obs = start_obs(step="interraction", tool="collect_sample_from_user", args={"i": i})
-    try:
-        uFactory_xArm.pick_sample_from_userarea()
-        uFactory_xArm.place_sample_to_bed(i)
-        obs = finish_ok(obs, sample=i, extra_meta={"source": "userarea"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
+    with _call(obs, tool_zones("collect_sample_from_user", i)) as ok:
+        MACROS.chain("pick_sample_from_userarea", "place_sample_to_bed", i=i)
+        ok(sample=i, extra_meta={"source": "userarea"})
     return obs
 
 def go_home() -> Observation:
@@ -234,11 +277,68 @@ def go_home() -> Observation:
         home
     """
     obs = start_obs(step="home", tool="go_home", args={})
-    try:
-        uFactory_xArm.move_to(uFactory_xArm.home)
-        obs = finish_ok(obs, extra_meta={"pose": "home"})
-    except Exception as e:
-        obs = finish_err(obs, e)
-    finally:
-        log_observation(obs)
-    return obs
\ No newline at end of file
+    with _call(obs, tool_zones("go_home")) as ok:
+        uFactory_xArm.move_to(uFactory_xArm.context().home)
+        ok(extra_meta={"pose": "home"})
+    return obs
+
+def dry_run(calls: list) -> list:
+    """
+    Estimate the cost of a queue of tool calls without moving the robot.
+
+    Each call runs through the same code path as a real one, but commands are
+    sent to an accounting backend instead of the arm, the instruments are
+    skipped and nothing is logged. Use this before committing the arm to a
+    long queue, e.g. "OCP on all samples, then CV on all".
+
+    Args:
+        calls (list): Tool calls in order, each a tuple of the tool name and
+            its arguments, e.g. [("ocp_measurement", 1), ("go_home",)].
+
+    Returns:
+        list: One dict per call plus a final "total" row, each with the keys
+        step, status, error, moves, stops, grips, path_mm, kin_s and est_s
+        (estimated seconds).
+
+    Example:
+        >>> rows = dry_run([("ocp_measurement", i) for i in range(1, 6)])
+        >>> print(rows[-1]["est_s"])
+        123.4  # Example estimate
+    """
+    with uFactory_xArm.dry_run() as cost:
+        for name, *args in calls:
+            if name not in DRY_RUN_TOOLS:
+                raise ValueError(f"unknown tool: {name}")
+            globals()[name](*args)
+    return cost.table()
+
+DRY_RUN_TOOLS = tuple(TOOL_CHAINS)
+
+def cancel_current(reason: str = "cancelled by user", call: str = None) -> bool:
+    """
+    Stop a tool call that is currently running.
+
+    The call stops at its next waypoint or gripper action and then unwinds
+    what it has done so far: the arm retraces its path and a sample it holds
+    or has put down goes back to the slot it came from. The call returns an
+    Observation with status "cancelled". Call this from another thread than
+    the one running the tool, e.g. a UI handler when the wrong sample was
+    requested. Other calls running at the same time, e.g. on a second arm
+    thread, are not affected.
+
+    Args:
+        reason (str): Recorded as the cancelled call's error message.
+        call (str): The call to stop, named like "ocp_measurement(i=5)" (see
+            uFactory_xArm.running_calls()). Can be omitted when only one call
+            is running.
+
+    Returns:
+        bool: True if a running call was signalled, False if it was not
+        running, or if call was omitted while several calls were running.
+
+    Example:
+        >>> threading.Thread(target=ocp_measurement, args=(5,)).start()
+        >>> cancel_current("meant sample 4", call="ocp_measurement(i=5)")
+        True
+    """
+    return uFactory_xArm.cancel(reason, call)
@@ -0,0 +1,179 @@
+# tuner.py
+
+import json, statistics, time
+from robotmotion import uFactory_xArm
+from motionprogram import Move, optimize, apply_load_profiles
+from motionmodel import TOOL_CHAINS, tool_program
+from gripper import GripperController
+
+U = uFactory_xArm
+FACTORS = (1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0)
+OPEN = 130      # jaw position robotmotion's gripper_open() drives to
+
+
+def tool_calls(samples=None):
+    """(tool, args) for every tools.py operation, over samples (default: every bed slot)."""
+    samples = samples or range(1, len(U.BED) + 1)
+    return [(t, {} if t == "go_home" else {"i": i})
+            for t in TOOL_CHAINS for i in ([None] if t == "go_home" else samples)]
+
+
+def segments(prog):
+    """
+    [(src, dst, speed)] for consecutive moves. src/dst carry the speeds they
+    actually run at (load profiles applied); speed is dst's planned speed,
+    which a SEGMENT_PROFILES entry replaces.
+    """
+    prog = optimize(prog)
+    profiled, _ = apply_load_profiles(prog, U.LOAD_PROFILES or {})
+    moves = [(a, b) for a, b in zip(prog, profiled) if isinstance(a, Move)]
+    return [(s, d, plan.speed) for (_, s), (plan, d) in zip(moves, moves[1:]) if s.pose != d.pose]
+
+
+class SpeedTuner:
+    """
+    Replays each pose-to-pose segment of the tools.py programs at increasing
+    speed factors and keeps the fastest one that finishes without a
+    controller error or warning and still gets faster. Segments are replayed
+    empty-handed with the jaws open, as a pick approaches, so the arm never
+    descends onto a slot or station with them closed. Works against the
+    real arm or a SimXArmAPI; with a simulator the virtual clock is used.
+
+        t = SpeedTuner(SimXArmAPI(time_scale=None))
+        t.tune(); t.save("tuned_poses.json")
+        uFactory_xArm.load_tuned("tuned_poses.json")
+    """
+
+    def __init__(self, arm, factors=FACTORS, repeats=1, min_gain=0.02):
+        self.arm = arm
+        self.factors = factors
+        self.repeats = repeats
+        self.min_gain = min_gain
+        self.gripper = GripperController(arm)
+        self.results = {}       # (src, dst) -> {"speed", "joint", "factor", "base_s", "tuned_s", "faults": [fault]}
+
+    def _now(self):
+        clock = getattr(self.arm, "clock", None)
+        return clock if clock is not None else time.time()
+
+    def _go(self, step, speed, ik):
+        arm = self.arm
+        if step.joint:
+            angles = ik.joints(arm, step.name, step.pose)
+            return arm.set_servo_angle(angle=angles, speed=speed, mvacc=step.mvacc, wait=True)
+        x,y,z,r,p,yaw = step.pose
+        return arm.set_position(x=x, y=y, z=z, roll=r, pitch=p, yaw=yaw, speed=speed,
+                                mvacc=step.mvacc, wait=True)
+
+    def _open(self):
+        # Before every replay: a fault or an operator may have moved the jaws since the last one.
+        code, pos = self.arm.get_gripper_position()
+        if code in (0, None) and pos is not None and pos >= OPEN - self.gripper.tol:
+            return
+        self.gripper.trigger(OPEN)
+        self.gripper.wait()
+        code, pos = self.arm.get_gripper_position()
+        if code not in (0, None) or pos is None or pos < OPEN - self.gripper.tol:
+            raise RuntimeError(f"gripper did not open before the descent: code {code}, jaws at {pos}")
+
+    def _fault(self, code):
+        ew = self.arm.get_err_warn_code()
+        err, warn = ew[1] if ew[0] in (0, None) else (None, None)
+        if code in (0, None) and not err and not warn:
+            return None
+        self.arm.clean_error(); self.arm.clean_warn()
+        self.arm.motion_enable(True); self.arm.set_mode(0); self.arm.set_state(0)
+        return {"code": code, "err": err, "warn": warn}
+
+    def time_segment(self, src, dst, factor, ik):
+        """(median seconds for src -> dst at dst.speed * factor, None) or (None, the fault dict)."""
+        times = []
+        for _ in range(self.repeats):
+            self._open()
+            fault = self._fault(self._go(src, src.speed, ik))
+            if fault:
+                return None, dict(fault, move="to start")
+            t0 = self._now()
+            code = self._go(dst, dst.speed * factor, ik)
+            t = self._now() - t0
+            fault = self._fault(code)
+            if fault:
+                return None, fault
+            times.append(t)
+        return statistics.median(times), None
+
+    def tune(self, calls=None):
+        ik = U.ik_cache("tuner")
+        pairs = {}
+        for tool, args in calls or tool_calls():
+            for src, dst, speed in segments(tool_program(tool, args)):
+                # Keep the fastest-running occurrence, e.g. the empty one of a segment also run loaded.
+                key = (src.name, dst.name)
+                if key not in pairs or dst.speed > pairs[key][1].speed:
+                    pairs[key] = (src, dst, speed)
+        for key, (src, dst, speed) in pairs.items():
+            base, fault = self.time_segment(src, dst, 1.0, ik)
+            best = base
+            res = {"speed": speed, "joint": dst.joint, "factor": 1.0, "base_s": base, "tuned_s": base,
+                   "faults": [dict(fault, factor=1.0)] if fault else []}
+            if base is not None:
+                for f in self.factors:
+                    if f <= 1.0:
+                        continue
+                    t, fault = self.time_segment(src, dst, f, ik)
+                    if t is None:
+                        res["faults"].append(dict(fault, factor=f))
+                        break
+                    if t > best * (1 - self.min_gain):
+                        break       # capped by the controller or too short to speed up
+                    best, res["factor"], res["tuned_s"] = t, f, t
+            self.results[key] = res
+        return self.results
+
+    def report(self, calls=None):
+        """[{tool, args, base_s, tuned_s, saved_s}] summed over each operation's segments."""
+        rows = []
+        for tool, args in calls or tool_calls():
+            base = tuned = 0.0
+            for src, dst, _ in segments(tool_program(tool, args)):
+                r = self.results.get((src.name, dst.name))
+                if r and r["base_s"] is not None:
+                    base += r["base_s"]; tuned += r["tuned_s"]
+            rows.append({"tool": tool, "args": args, "base_s": round(base, 3),
+                         "tuned_s": round(tuned, 3), "saved_s": round(base - tuned, 3)})
+        return rows
+
+    def save(self, path, calls=None):
+        """
+        Tuned pose-table file for uFactory_xArm.load_tuned(): per-segment speeds
+        for SEGMENT_PROFILES, the slowest tuned Cartesian speed into each named
+        pose as its own speed, and the per-operation report.
+        """
+        table = U.pose_table()
+        segs, poses = {}, {}
+        for (src, dst), r in self.results.items():
+            speed = round(r["speed"] * r["factor"], 1)
+            if r["factor"] != 1.0:
+                segs[f"{src}>{dst}"] = {"speed": speed}
+            if dst in table and not r["joint"]:
+                poses[dst] = min(poses.get(dst, speed), speed)
+        out = {"poses": {n: table[n][:6] + [s] for n, s in poses.items() if s != table[n][-1]},
+               "segments": segs, "report": self.report(calls)}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=1)
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Tune per-segment speeds and write a tuned pose-table file.")
+    ap.add_argument("--sim", action="store_true", help="tune against the simulator instead of the arm")
+    ap.add_argument("--out", default="tuned_poses.json")
+    ap.add_argument("--samples", type=int, nargs="*", help="bed slots to tune (default: all)")
+    ap.add_argument("--repeats", type=int, default=1)
+    a = ap.parse_args()
+    tuner = SpeedTuner(U.connect(sim=a.sim), repeats=a.repeats)
+    calls = tool_calls(a.samples)
+    tuner.tune(calls)
+    for row in tuner.save(a.out, calls)["report"]:
+        print(f"{row['tool']:26} {str(row['args']):10} {row['base_s']:8.2f} s -> {row['tuned_s']:8.2f} s  (-{row['saved_s']:.2f} s)")
@@ -0,0 +1,171 @@
+# zones.py
+
+import itertools, threading, time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+class DeadlockError(RuntimeError):
+    pass
+
+
+class LeaseExpired(RuntimeError):
+    pass
+
+
+@dataclass
+class Lease:
+    id: int
+    owner: str
+    zones: tuple
+    expires: float
+    thread: threading.Thread | None = None     # holder when owned by the calling thread
+
+
+def tool_zones(tool, i=None):
+    """Physical zones a tools.py call occupies for its whole duration."""
+    bed = (f"bed:{i}",) if i is not None else ()
+    if tool in ("ocp_measurement", "ca_measurement", "cv_measurement"):
+        return bed + ("measurementstation",)
+    if tool in ("bring_sample_to_user", "collect_sample_from_user"):
+        return bed + ("userarea", "userroute")
+    return bed
+
+
+class ZoneManager:
+    """
+    Lease-based reservations for named zones (bed slots, measurement station,
+    user area, the user-area route's swept volume, the arm itself).
+
+    Waiters are served FIFO per zone. A request that would close a cycle in
+    the wait-for graph raises DeadlockError instead of blocking. A lease held
+    by a live thread lasts until it is released, however long the call runs;
+    expiry only reclaims leases taken for an explicit owner or by a thread
+    that died holding them, once someone else needs the zone. A thread may
+    re-acquire zones it already holds.
+    """
+
+    def __init__(self, default_lease=300.0):
+        self.default_lease = default_lease
+        self._cv = threading.Condition()
+        self._ids = itertools.count(1)
+        self._held = defaultdict(list)      # zone -> [Lease], all from one owner
+        self._queue = defaultdict(deque)    # zone -> deque[(ticket, owner)]
+        self.expired = 0
+
+    @staticmethod
+    def _me():
+        # Pool workers share one thread name, so the ident keeps owners apart.
+        return f"{threading.current_thread().name}#{threading.get_ident()}"
+
+    @staticmethod
+    def _alive(lease):
+        return lease.thread is not None and lease.thread.is_alive()
+
+    def _reap(self, now):
+        for z, leases in self._held.items():
+            live = [l for l in leases if l.expires > now or self._alive(l)]
+            self.expired += len(leases) - len(live)
+            leases[:] = live
+
+    def _ready(self, z, ticket, owner):
+        held = self._held[z]
+        if held:
+            return all(l.owner == owner for l in held)
+        return self._queue[z][0][0] == ticket
+
+    def _waits_for(self, owner):
+        # Owners that `owner` is blocked behind: current holders and earlier waiters.
+        out = set()
+        for z, q in self._queue.items():
+            tickets = [t for t, o in q if o == owner]
+            if not tickets:
+                continue
+            out.update(l.owner for l in self._held[z])
+            first = tickets[0]
+            out.update(o for t, o in q if t < first)
+        out.discard(owner)
+        return out
+
+    def _cycle(self, owner):
+        stack, seen = [(owner, [owner])], set()
+        while stack:
+            node, path = stack.pop()
+            for nxt in self._waits_for(node):
+                if nxt == owner:
+                    return path + [owner]
+                if nxt not in seen:
+                    seen.add(nxt)
+                    stack.append((nxt, path + [nxt]))
+        return None
+
+    def acquire(self, *zones, owner=None, lease_s=None, timeout=None):
+        thread = threading.current_thread() if owner is None else None
+        owner = owner or self._me()
+        zones = tuple(sorted(set(zones)))
+        lease_s = lease_s or self.default_lease
+        ticket = next(self._ids)
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cv:
+            # Zones the owner already holds are re-entered without queueing.
+            queued = [z for z in zones if not any(l.owner == owner for l in self._held[z])]
+            for z in queued:
+                self._queue[z].append((ticket, owner))
+            try:
+                while True:
+                    now = time.time()
+                    self._reap(now)
+                    if all(self._ready(z, ticket, owner) for z in zones):
+                        break
+                    cycle = self._cycle(owner)
+                    if cycle:
+                        raise DeadlockError(f"zones {zones}: wait cycle {' -> '.join(cycle)}")
+                    if deadline is not None and now >= deadline:
+                        raise TimeoutError(f"zones {zones} not free within {timeout}s")
+                    expiries = [l.expires for z in zones for l in self._held[z] if not self._alive(l)]
+                    wake = min(expiries + ([deadline] if deadline else []), default=now + 1.0)
+                    self._cv.wait(max(min(wake - now, 1.0), 0.001))
+                lease = Lease(ticket, owner, zones, time.time() + lease_s, thread)
+                for z in zones:
+                    self._held[z].append(lease)
+                return lease
+            finally:
+                for z in queued:
+                    self._queue[z].remove((ticket, owner))
+                self._cv.notify_all()
+
+    def release(self, lease):
+        with self._cv:
+            for z in lease.zones:
+                if lease in self._held[z]:
+                    self._held[z].remove(lease)
+            self._cv.notify_all()
+
+    def renew(self, lease, lease_s=None):
+        with self._cv:
+            if not all(lease in self._held[z] for z in lease.zones):
+                raise LeaseExpired(f"lease {lease.id} on {lease.zones} was reclaimed")
+            lease.expires = time.time() + (lease_s or self.default_lease)
+
+    @contextmanager
+    def reserve(self, *zones, owner=None, lease_s=None, timeout=None):
+        lease = self.acquire(*zones, owner=owner, lease_s=lease_s, timeout=timeout)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def status(self):
+        """{zone: {"owner", "expires_in", "waiting"}} for held or contended zones; expires_in is None while the holder lives."""
+        with self._cv:
+            now = time.time()
+            zones = set(z for z, l in self._held.items() if l) | set(z for z, q in self._queue.items() if q)
+            expiring = {z: [l.expires for l in self._held[z] if not self._alive(l)] for z in zones}
+            return {z: {"owner": self._held[z][0].owner if self._held[z] else None,
+                        "expires_in": round(min(expiring[z]) - now, 3) if expiring[z] else None,
+                        "waiting": [o for _, o in self._queue[z]]}
+                    for z in sorted(zones)}
+
+
+ZONES = ZoneManager()